@@ -1,12 +1,91 @@
 from flask import Flask, render_template, request, jsonify
 from core.game import PokerGame
-from utils.assistant import PokerAssistant
+from core.variants import get_variant
+from utils.singleflight import SingleFlight
+from utils.table_updates import TableUpdates
 from core.card import Card, Rank, Suit
+# utils.assistant (y las tablas que usa) se importa en el primer análisis para acotar el arranque en frío
+try:
+    # Canal WebSocket opcional; sin flask-sock los clientes usan solo los endpoints HTTP
+    from flask_sock import Sock
+    from simple_websocket import ConnectionClosed
+except ImportError:
+    Sock = None
+
+    class ConnectionClosed(Exception):
+        """Sustituto para el bucle del canal cuando flask-sock no está instalado"""
 
 app = Flask(__name__)
 
 game = None
-assistant = None
+assistants = {}
+# Peticiones de análisis idénticas y simultáneas comparten una sola simulación
+analysis_flight = SingleFlight(timeout=30.0)
+# Estado y análisis empujados a los clientes conectados a la mesa por WebSocket
+table_updates = TableUpdates()
+TABLE_ID = 'main'
+# Cada cuánto el canal de la mesa atiende los mensajes del cliente mientras espera actualizaciones
+SOCKET_POLL_SECONDS = 1.0
+# Límites del coste de cálculo que puede pedir un cliente
+MAX_SOLVER_ITERATIONS = 500
+MAX_EQUITY_SIMULATIONS = 20000
+MAX_GRID_SIMULATIONS = 2000
+# Escenarios de un lote ICM: exactos (hasta 12 jugadores) o por Monte Carlo (más caros)
+MAX_ICM_PLAYERS = 100
+MAX_ICM_SCENARIOS = 2000
+MAX_ICM_MONTE_CARLO_SCENARIOS = 20
+
+def _get_assistant(player_idx: int = 0):
+    """Asistente del asiento `player_idx`, creado en el primer análisis que lo necesite"""
+    assistant = assistants.get(player_idx)
+    if assistant is None or assistant.game is not game:
+        from utils.assistant import PokerAssistant
+        assistant = assistants[player_idx] = PokerAssistant(game, player_idx)
+    return assistant
+
+def _request_option(name, default=None):
+    """Lee una opción del cuerpo JSON o, en su defecto, de la query string"""
+    data = request.get_json(silent=True) or {}
+    return data.get(name, request.args.get(name, default))
+
+def _flag_option(name, default=False) -> bool:
+    value = _request_option(name, default)
+    if isinstance(value, str):
+        return value.lower() in ('1', 'true', 'yes')
+    return bool(value)
+
+def _bounded_int_option(name, default: int, low: int, high: int) -> int:
+    """Opción entera recortada a [low, high]: acota el coste de una petición"""
+    return min(max(int(_request_option(name, default)), low), high)
+
+def _wants_compact() -> bool:
+    return _flag_option('compact')
+
+def _same_game() -> bool:
+    """Si el cliente se refiere al juego actual (o no indica ninguno)"""
+    game_id = _request_option('game_id')
+    return game_id is None or str(game_id) == str(game.game_id)
+
+def _serialize_state():
+    """Estado del juego completo o, si el cliente envía `since_version`, solo el delta"""
+    compact = _wants_compact()
+    since_version = _request_option('since_version')
+    # Una versión de otro juego no sirve como base del delta
+    if since_version is not None and _same_game():
+        try:
+            return game.get_state_delta(int(since_version), compact)
+        except (TypeError, ValueError):
+            pass
+    return game.get_game_state(compact)
+
+def _publish_state():
+    """Empuja el nuevo estado a los clientes conectados a la mesa"""
+    table_updates.publish_state(TABLE_ID, game)
+
+def _publish_analysis(kind: str, analysis: dict, **meta):
+    """Empuja un resultado de análisis a los clientes conectados a la mesa"""
+    if 'error' not in analysis:
+        table_updates.publish_analysis(TABLE_ID, game, kind, analysis, **meta)
 
 @app.route('/')
 def index():
@@ -15,18 +94,20 @@ def index():
 @app.route('/new_game', methods=['POST'])
 def new_game():
     try:
-        global game, assistant
+        global game
         num_players = request.json.get('num_players', 2)
         player_names = request.json.get('player_names', None)
         if not 2 <= num_players <= 6:
             return jsonify({'error': 'Número de jugadores debe estar entre 2 y 6'}), 400
-        game = PokerGame(num_players, player_names)
+        variant = get_variant(request.json.get('variant', 'holdem'))
+        game = PokerGame(num_players, player_names, variant)
         game.start_new_hand()
-        assistant = PokerAssistant(game)
-        state = game.get_game_state()
-        print('[DEBUG new_game] state:', state)
+        assistants.clear()
+        _publish_state()
+        state = _serialize_state()
+        print('[DEBUG new_game] version:', game.version)
         return jsonify({
-            'game_id': '1',
+            'game_id': str(game.game_id),
             'game_state': state,
             'message': 'Nuevo juego creado'
         })
@@ -42,7 +123,7 @@ def new_game():
 @app.route('/deal_cards', methods=['POST'])
 def deal_cards():
     try:
-        global game, assistant
+        global game
         if not game:
             return jsonify({'error': 'No hay juego activo'}), 400
         # Usar el Enum GameStage para avanzar etapas
@@ -54,8 +135,9 @@ def deal_cards():
             game.deal_river()
         else:
             return jsonify({'error': 'No se pueden hacer más movimientos'}), 400
-        new_state = game.get_game_state()
-        print('[DEBUG deal_cards] new_state:', new_state)
+        _publish_state()
+        new_state = _serialize_state()
+        print('[DEBUG deal_cards] version:', game.version)
         return jsonify({
             'game_state': new_state,
             'message': 'Cartas repartidas'
@@ -68,18 +150,24 @@ def deal_cards():
 @app.route('/analyze_hand', methods=['POST'])
 def analyze_hand():
     try:
-        global game, assistant
+        global game
         if not game:
             return jsonify({'error': 'No hay juego activo'}), 400
             
         player_idx = request.json.get('player_idx', 0)
-        if player_idx >= game.num_players:
+        if not 0 <= player_idx < game.num_players:
             return jsonify({'error': 'Índice de jugador inválido'}), 400
             
-        analysis = assistant.suggest_best_action()
+        pot_odds = float(request.json.get('pot_odds', 0.0))
+        if not 0 <= pot_odds < 1:
+            return jsonify({'error': 'pot_odds debe estar en [0, 1)'}), 400
+
+        assistant = _get_assistant(player_idx)
+        analysis = analysis_flight.do(('analyze_hand', pot_odds) + assistant.situation_key(),
+                                      lambda: assistant.suggest_best_action(pot_odds))
+        _publish_analysis('analyze_hand', analysis, player_idx=player_idx)
         print('[DEBUG analyze_hand] analysis:', analysis)
-        game_state = game.get_game_state()
-        print('[DEBUG analyze_hand] game_state:', game_state)
+        game_state = _serialize_state()
         
         if not game_state or not isinstance(game_state, dict):
             return jsonify({'error': 'Estado del juego inválido'}), 500
@@ -94,18 +182,21 @@ def analyze_hand():
 @app.route('/advanced_analysis', methods=['POST'])
 def advanced_analysis():
     try:
-        global game, assistant
+        global game
         if not game:
             return jsonify({'error': 'No hay juego activo'}), 400
             
         player_idx = request.json.get('player_idx', 0)
-        if player_idx >= game.num_players:
+        if not 0 <= player_idx < game.num_players:
             return jsonify({'error': 'Índice de jugador inválido'}), 400
             
-        analysis = assistant.predict_winning_probability()
+        assistant = _get_assistant(player_idx)
+        known_hands = _flag_option('known_hands')
+        analysis = analysis_flight.do(('advanced_analysis',) + assistant.situation_key(known_hands),
+                                      lambda: assistant.predict_winning_probability(known_hands=known_hands))
+        _publish_analysis('advanced_analysis', analysis, player_idx=player_idx)
         print('[DEBUG advanced_analysis] analysis:', analysis)
-        game_state = game.get_game_state()
-        print('[DEBUG advanced_analysis] game_state:', game_state)
+        game_state = _serialize_state()
         
         if not game_state or not isinstance(game_state, dict):
             return jsonify({'error': 'Estado del juego inválido'}), 500
@@ -117,14 +208,159 @@ def advanced_analysis():
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
+@app.route('/equity', methods=['POST'])
+def equity():
+    """
+    Equidad de todos los asientos: manos conocidas (vista de mesa) u ocultas (vista de un jugador).
+    `simulations` se recorta a MAX_EQUITY_SIMULATIONS (la muestra ocupa memoria proporcional).
+    """
+    try:
+        global game
+        if not game:
+            return jsonify({'error': 'No hay juego activo'}), 400
+
+        player_idx = int(_request_option('player_idx', 0))
+        if not 0 <= player_idx < game.num_players:
+            return jsonify({'error': 'Índice de jugador inválido'}), 400
+
+        analysis = _get_assistant(player_idx).calculate_all_seats_equity(
+            known_hands=_flag_option('known_hands', True),
+            simulations=_bounded_int_option('simulations', 1000, 1, MAX_EQUITY_SIMULATIONS),
+        )
+        if 'error' in analysis:
+            return jsonify(analysis), 400
+        _publish_analysis('equity', analysis, player_idx=player_idx)
+        return jsonify({
+            'analysis': analysis,
+            'game_state': _serialize_state()
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/hand_grid', methods=['POST'])
+def hand_grid():
+    """
+    Equidad de las 169 clases de manos iniciales (cuadrícula 13x13) en el board actual.
+    `simulations` (runouts del board) se recorta a MAX_GRID_SIMULATIONS.
+    """
+    try:
+        global game
+        if not game:
+            return jsonify({'error': 'No hay juego activo'}), 400
+
+        num_opponents = int(_request_option('num_opponents', 1))
+        simulations = _request_option('simulations')
+        if simulations is not None:
+            simulations = _bounded_int_option('simulations', None, 1, MAX_GRID_SIMULATIONS)
+        assistant = _get_assistant(0)
+        key = ('hand_grid', game.variant.name, assistant.situation_key()[2], num_opponents, simulations)
+        analysis = analysis_flight.do(key, lambda: assistant.calculate_hand_class_grid(num_opponents, simulations))
+        if 'error' in analysis:
+            return jsonify(analysis), 400
+        _publish_analysis('hand_grid', analysis, num_opponents=num_opponents)
+        return jsonify({'analysis': analysis})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/solve_river', methods=['POST'])
+def solve_river():
+    """
+    Estrategia de equilibrio en el river heads-up (CFR+) para la mano de `player_idx`.
+    `pot` es obligatorio: la mesa no lleva ciegas ni apuestas de las que deducirlo.
+    `iterations` se recorta a MAX_SOLVER_ITERATIONS.
+    """
+    try:
+        global game
+        if not game:
+            return jsonify({'error': 'No hay juego activo'}), 400
+
+        player_idx = int(_request_option('player_idx', 0))
+        if not 0 <= player_idx < game.num_players:
+            return jsonify({'error': 'Índice de jugador inválido'}), 400
+
+        opponent_idx = _request_option('opponent_idx')
+        pot = _request_option('pot')
+        options = {
+            'opponent_idx': None if opponent_idx is None else int(opponent_idx),
+            'pot': None if pot is None else int(pot),
+            'bet_sizes': tuple(float(size) for size in _request_option('bet_sizes', (0.5, 1.0))),
+            'opponent_range': _request_option('opponent_range'),
+            'acts_first': _flag_option('acts_first', True),
+            'iterations': _bounded_int_option('iterations', 300, 1, MAX_SOLVER_ITERATIONS),
+        }
+        assistant = _get_assistant(player_idx)
+        key = ('solve_river',) + assistant.situation_key() + (
+            repr(sorted(options.items())),
+            tuple((p.chips, p.current_bet, p.folded) for p in game.players))
+        analysis = analysis_flight.do(key, lambda: assistant.solve_river_spot(**options))
+        if 'error' in analysis:
+            return jsonify(analysis), 400
+        _publish_analysis('solve_river', analysis, player_idx=player_idx)
+        return jsonify({'analysis': analysis})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/icm', methods=['POST'])
+def icm():
+    """
+    Equidad ICM. Sin `stacks` usa las fichas de los jugadores de la mesa; con `stacks`
+    (lista de vectores de fichas) evalúa todos los escenarios en un solo lote, de hasta
+    MAX_ICM_SCENARIOS escenarios (MAX_ICM_MONTE_CARLO_SCENARIOS con más de 12 jugadores).
+    """
+    try:
+        from utils.icm import EXACT_MAX_PLAYERS, icm_equity_batch, table_icm
+        payouts = request.json.get('payouts')
+        if not payouts:
+            return jsonify({'error': 'Se requieren los premios (payouts)'}), 400
+        stacks = request.json.get('stacks')
+        if stacks is not None:
+            if not stacks or not isinstance(stacks, list) or not isinstance(stacks[0], list):
+                return jsonify({'error': 'stacks debe ser una lista de vectores de fichas'}), 400
+            players = len(stacks[0])
+            limit = MAX_ICM_SCENARIOS if players <= EXACT_MAX_PLAYERS else MAX_ICM_MONTE_CARLO_SCENARIOS
+            if not 1 <= players <= MAX_ICM_PLAYERS or len(stacks) > limit:
+                return jsonify({'error': f'Como máximo {limit} escenarios de hasta {MAX_ICM_PLAYERS} jugadores'}), 400
+            return jsonify({'equities': icm_equity_batch(stacks, payouts).tolist()})
+        if not game:
+            return jsonify({'error': 'No hay juego activo'}), 400
+        return jsonify({'players': table_icm(game.players, payouts)})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/stats', methods=['GET'])
+def stats():
+    """Contadores de coalescencia de peticiones de análisis y de actualizaciones empujadas"""
+    return jsonify({'analysis_coalescing': analysis_flight.stats(),
+                    'table_updates': table_updates.stats()})
+
+@app.route('/game_state', methods=['GET'])
+def game_state():
+    global game
+    if not game:
+        return jsonify({'error': 'No hay juego activo'}), 400
+    if _request_option('since_version') is not None:
+        return jsonify({'game_state': _serialize_state()})
+    # La ETag solo acompaña al estado completo: es el único cuerpo que identifica la versión
+    compact = _wants_compact()
+    state = game.get_game_state(compact)
+    etag = game.state_etag(compact, state['version'])
+    if etag in request.if_none_match:
+        response = app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+    response = jsonify({'game_state': state})
+    response.set_etag(etag)
+    return response
+
 @app.route('/reset_game/<int:game_id>', methods=['POST'])
 def reset_game(game_id):
     try:
-        global game, assistant
+        global game
         if not game:
             return jsonify({'error': 'No hay juego activo'}), 400
         game.start_new_hand()
-        game_state = game.get_game_state()
+        _publish_state()
+        game_state = _serialize_state()
         
         if not game_state or not isinstance(game_state, dict):
             return jsonify({'error': 'Estado del juego inválido'}), 500
@@ -139,26 +375,28 @@ def reset_game(game_id):
 @app.route('/set_custom_hand', methods=['POST'])
 def set_custom_hand():
     try:
-        global game, assistant
+        global game
         if not game:
             return jsonify({'error': 'No hay juego activo'}), 400
             
         cards = request.json.get('cards')
-        if not cards or len(cards) != 2:
-            return jsonify({'error': 'Las dos cartas son requeridas'}), 400
-        card1, card2 = cards
+        hole_cards = game.variant.hole_cards
+        if not cards or len(cards) != hole_cards:
+            return jsonify({'error': f'Se requieren {hole_cards} cartas'}), 400
 
         # Validar que las cartas sean válidas
         try:
-            card1_obj = Card(Rank[card1['rank']], Suit[card1['suit']])
-            card2_obj = Card(Rank[card2['rank']], Suit[card2['suit']])
+            card_objs = [Card(Rank[card['rank']], Suit[card['suit']]) for card in cards]
         except (KeyError, TypeError):
             return jsonify({'error': 'Formato de cartas inválido'}), 400
+        if len(set(card_objs)) != hole_cards or any(card.rank not in game.variant.ranks for card in card_objs):
+            return jsonify({'error': 'Formato de cartas inválido'}), 400
 
         # Actualizar la mano del jugador
-        game.players[0].hand = [card1_obj, card2_obj]
+        game.set_player_hand(0, card_objs)
+        _publish_state()
 
-        game_state = game.get_game_state()
+        game_state = _serialize_state()
 
         if not game_state or not isinstance(game_state, dict):
             return jsonify({'error': 'Estado del juego inválido'}), 500
@@ -170,6 +408,45 @@ def set_custom_hand():
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
+def _int_option(name):
+    """Opción entera o None si falta o está mal formada"""
+    try:
+        return int(_request_option(name))
+    except (TypeError, ValueError):
+        return None
+
+def _serve_table_socket(ws):
+    """
+    Canal de la mesa: empuja deltas versionados del estado y los análisis según se producen.
+    Query string opcional: `compact`, y `game_id` + `since_version` para reanudar desde un
+    estado que el cliente ya tiene (si no son válidos se envía el estado completo). El cliente
+    puede enviar {"type": "resync"} para pedir el estado completo.
+    """
+    subscription = table_updates.subscribe(TABLE_ID, game, compact=_wants_compact(),
+                                           game_id=_int_option('game_id'),
+                                           since_version=_int_option('since_version'))
+    try:
+        while True:
+            message = subscription.next_message(timeout=SOCKET_POLL_SECONDS)
+            if message is not None:
+                ws.send(app.json.dumps(message))
+            incoming = ws.receive(timeout=0)
+            if incoming:
+                try:
+                    resync = app.json.loads(incoming).get('type') == 'resync'
+                except (ValueError, AttributeError):
+                    resync = False
+                if resync:
+                    subscription.resync(game)
+    except ConnectionClosed:
+        pass
+    finally:
+        table_updates.unsubscribe(subscription)
+
+if Sock is not None:
+    sock = Sock(app)
+    sock.route('/ws/table')(_serve_table_socket)
+
 if __name__ == '__main__':
     import os
     port = int(os.environ.get('PORT', 5000))
@@ -0,0 +1,87 @@
+"""
+Benchmark de arranque en frío.
+
+Lanza intérpretes nuevos (como haría una invocación serverless en frío) y mide:
+- el tiempo de `import app`,
+- la latencia de la primera petición a cada endpoint,
+- qué tablas diferidas (utils.lazy_tables) se llegaron a cargar.
+
+Uso:
+    python -m benchmarks.cold_start [--runs 5] [--max-import-ms 500] [--max-first-request-ms 2000]
+Sale con código 1 si se supera alguno de los presupuestos indicados.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Código ejecutado en cada proceso hijo; imprime un JSON en la última línea
+_CHILD = r'''
+import contextlib, io, json, sys, time
+t0 = time.perf_counter()
+import app
+import_ms = (time.perf_counter() - t0) * 1000
+client = app.app.test_client()
+requests = [
+    ("GET", "/", None),
+    ("POST", "/new_game", {"num_players": 2}),
+    ("POST", "/deal_cards", {}),
+    ("POST", "/analyze_hand", {"player_idx": 0}),
+]
+first_request_ms = {}
+with contextlib.redirect_stdout(io.StringIO()):
+    for method, path, body in requests:
+        t0 = time.perf_counter()
+        client.open(path, method=method, json=body)
+        first_request_ms[path] = (time.perf_counter() - t0) * 1000
+from utils.lazy_tables import TABLES
+print(json.dumps({
+    "import_ms": import_ms,
+    "first_request_ms": first_request_ms,
+    "modules": len(sys.modules),
+    "tables_loaded": sorted(name for name, table in TABLES.items() if table.loaded),
+}))
+'''
+
+
+def run_once() -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", _CHILD], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-import-ms", type=float, default=None)
+    parser.add_argument("--max-first-request-ms", type=float, default=None)
+    args = parser.parse_args(argv)
+
+    runs = [run_once() for _ in range(args.runs)]
+    import_ms = statistics.median(r["import_ms"] for r in runs)
+    print(f"import app            mediana {import_ms:8.1f} ms  ({runs[0]['modules']} módulos)")
+    first_requests = {}
+    for path in runs[0]["first_request_ms"]:
+        first_requests[path] = statistics.median(r["first_request_ms"][path] for r in runs)
+        print(f"primera {path:<14} mediana {first_requests[path]:8.1f} ms")
+    print("tablas cargadas:", ", ".join(runs[-1]["tables_loaded"]) or "ninguna")
+
+    failed = False
+    if args.max_import_ms is not None and import_ms > args.max_import_ms:
+        print(f"FALLO: import app {import_ms:.1f} ms > {args.max_import_ms} ms")
+        failed = True
+    if args.max_first_request_ms is not None:
+        for path, ms in first_requests.items():
+            if ms > args.max_first_request_ms:
+                print(f"FALLO: primera petición a {path} {ms:.1f} ms > {args.max_first_request_ms} ms")
+                failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
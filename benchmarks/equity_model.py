@@ -0,0 +1,112 @@
+"""
+Benchmark de latencia frente a precisión del aproximador de equidad.
+
+Sobre un conjunto fijo de situaciones (flop, turn y river, 1 a 9 rivales) compara con una
+referencia de muchas simulaciones:
+- Monte Carlo con distintos números de simulaciones,
+- el modelo aprendido (utils.equity_model), con la caché de fuerza de mano fría,
+- el modo híbrido del asistente: modelo si la cota de error está en tolerancia, si no simulación.
+
+Uso:
+    python -m benchmarks.equity_model [--spots 200] [--reference-simulations 20000]
+                                      [--simulations 250 1000 4000] [--tolerance 0.03] [--model RUTA]
+Requiere un modelo entrenado (`python -m utils.equity_model train`).
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from utils.equity import all_seats_equity
+from utils.equity_model import DEFAULT_TOLERANCE, MAX_OPPONENTS, MODEL_PATH, EquityModel, approximate_equity
+from utils.hand_strength import _hand_strength
+
+
+def _spots(count: int, seed: int):
+    rng = random.Random(seed)
+    spots = []
+    for _ in range(count):
+        cards = rng.sample(range(52), 2 + rng.choice((3, 4, 5)))
+        spots.append((cards[:2], cards[2:], rng.randint(1, MAX_OPPONENTS)))
+    return spots
+
+
+def _simulate(spot, simulations: int, seed: int) -> float:
+    hero, board, opponents = spot
+    result = all_seats_equity([hero] + [None] * opponents, board, simulations=simulations, seed=seed)
+    return result["seats"][0]["equity"]
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    value = fn()
+    return value, (time.perf_counter() - start) * 1000
+
+
+def _report(name: str, latencies, errors, extra: str = ""):
+    errors = np.asarray(errors)
+    print(f"{name:<22} {statistics.median(latencies):9.3f} ms  {np.mean(latencies):9.3f} ms  "
+          f"{errors.mean() * 100:6.2f} %  {np.quantile(errors, 0.9) * 100:6.2f} %  {extra}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--spots", type=int, default=200)
+    parser.add_argument("--reference-simulations", type=int, default=20000)
+    parser.add_argument("--simulations", type=int, nargs="+", default=[250, 1000, 4000])
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    try:
+        model = EquityModel.load(args.model)
+    except FileNotFoundError:
+        print(f"No hay modelo en {args.model}; entrénalo con `python -m utils.equity_model train`")
+        return 1
+    spots = _spots(args.spots, args.seed)
+    reference = [_simulate(spot, args.reference_simulations, seed=i) for i, spot in enumerate(spots)]
+
+    print(f"{len(spots)} situaciones, referencia de {args.reference_simulations} simulaciones")
+    print(f"{'método':<22} {'mediana':>12}  {'media':>12}  {'MAE':>8}  {'p90':>8}")
+    for simulations in args.simulations:
+        runs = [_timed(lambda: _simulate(spot, simulations, seed=10_000 + i)) for i, spot in enumerate(spots)]
+        _report(f"monte carlo {simulations}", [ms for _, ms in runs],
+                [abs(value - ref) for (value, _), ref in zip(runs, reference)])
+
+    model_runs = []
+    for hero, board, opponents in spots:
+        _hand_strength.cache_clear()
+        model_runs.append(_timed(lambda: model.predict(hero, board, opponents)))
+    _report("modelo (caché fría)", [ms for _, ms in model_runs],
+            [abs(equity - ref) for ((equity, _), _), ref in zip(model_runs, reference)])
+
+    served, hybrid = [], []
+    for i, spot in enumerate(spots):
+        hero, board, opponents = spot
+        _hand_strength.cache_clear()
+
+        def answer():
+            approximation = approximate_equity(hero, board, opponents, args.tolerance, model=model)
+            if approximation is not None:
+                return approximation["equity"], True
+            return _simulate(spot, 1000, seed=20_000 + i), False
+
+        (equity, from_model), ms = _timed(answer)
+        served.append(from_model)
+        hybrid.append((equity, ms))
+    errors = [abs(equity - ref) for (equity, _), ref in zip(hybrid, reference)]
+    served_errors = [e for e, s in zip(errors, served) if s]
+    _report(f"híbrido (tol {args.tolerance:.2f})", [ms for _, ms in hybrid], errors,
+            f"modelo en {np.mean(served) * 100:.0f} % (MAE {np.mean(served_errors) * 100 if served_errors else 0:.2f} %)")
+    print(f"calibración del modelo: MAE {model.calibration['mae'] * 100:.2f} %, "
+          f"cobertura de la cota {model.calibration['coverage'] * 100:.0f} % "
+          f"(objetivo {model.calibration['target_coverage'] * 100:.0f} %)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -43,9 +43,15 @@ class HandRank(Enum):
     STRAIGHT_FLUSH = 9
     ROYAL_FLUSH = 10
 
+COMPACT_RANKS = {rank: ("T" if rank.symbol == "10" else rank.symbol) for rank in Rank}
+COMPACT_SUITS = {Suit.HEARTS: "h", Suit.DIAMONDS: "d", Suit.CLUBS: "c", Suit.SPADES: "s"}
+_RANKS_BY_CODE = {code: rank for rank, code in COMPACT_RANKS.items()}
+_SUITS_BY_CODE = {code: suit for suit, code in COMPACT_SUITS.items()}
+
 class Card:
     """Representa una carta individual"""
-    
+    __slots__ = ("rank", "suit", "value", "symbol", "suit_symbol")
+
     def __init__(self, rank: Rank, suit: Suit):
         self.rank = rank
         self.suit = suit
@@ -68,6 +74,20 @@ class Card:
             'symbol': self.symbol,
             'suit_symbol': self.suit_symbol
         }
+
+    def to_compact(self) -> str:
+        """Devuelve la carta en notación compacta de dos caracteres (p. ej. 'Ah', 'Td')"""
+        return COMPACT_RANKS[self.rank] + COMPACT_SUITS[self.suit]
+
+    @staticmethod
+    def from_compact(code: str) -> 'Card':
+        """Construye una carta a partir de su notación compacta ('Ah', 'Td', ...)"""
+        if len(code) != 2:
+            raise ValueError(f"Carta compacta inválida: {code!r}")
+        try:
+            return Card(_RANKS_BY_CODE[code[0].upper()], _SUITS_BY_CODE[code[1].lower()])
+        except KeyError:
+            raise ValueError(f"Carta compacta inválida: {code!r}")
         self.value = rank.value[0]  # Usamos el valor numérico del Rank
         self.symbol = rank.symbol
         self.suit_symbol = suit.value
@@ -1,41 +1,86 @@
-from typing import List
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
 import random
 from core.card import Card, Rank, Suit
 
+
+@lru_cache(maxsize=None)
+def _ordered_cards(ranks: Tuple[Rank, ...]) -> Tuple[Card, ...]:
+    """Cartas de la baraja, compartidas por todos los mazos con los mismos rangos"""
+    return tuple(Card(rank, suit) for rank in ranks for suit in Suit)
+
+
 class Deck:
-    """Mazo de cartas"""
-    
-    def __init__(self):
-        self.cards = []
-        self.dealt_cards = []
+    """
+    Mazo de cartas; `ranks` permite barajas reducidas (p. ej. short deck, de 6 a As).
+
+    El orden barajado es una tupla inmutable de cartas compartidas y se reparte desde el final
+    moviendo un contador, así que el estado del mazo es (orden, cartas restantes) y se puede
+    guardar y restaurar en O(1).
+    """
+    __slots__ = ("ranks", "_order", "_left")
+
+    def __init__(self, ranks: Optional[Sequence[Rank]] = None):
+        self.ranks = tuple(ranks) if ranks is not None else tuple(Rank)
+        self._order: Tuple[Card, ...] = ()
+        self._left = 0
         self.reset()
-    
+
+    @property
+    def cards(self) -> List[Card]:
+        """Cartas que quedan en el mazo (la última es la siguiente en repartirse)"""
+        return list(self._order[:self._left])
+
+    @property
+    def dealt_cards(self) -> List[Card]:
+        """Cartas repartidas, en orden de reparto"""
+        return list(reversed(self._order[self._left:]))
+
     def reset(self):
         """Reinicia el mazo con todas las cartas"""
-        self.cards = [Card(rank, suit) for rank in Rank for suit in Suit]
-        self.dealt_cards = []
+        self._order = _ordered_cards(self.ranks)
+        self._left = len(self._order)
         self.shuffle()
-    
+
     def shuffle(self):
         """Baraja el mazo"""
-        random.shuffle(self.cards)
-    
+        remaining = self._order[:self._left]
+        self._order = tuple(random.sample(remaining, len(remaining))) + self._order[self._left:]
+
     def deal_card(self) -> Card:
         """Reparte una carta del mazo"""
-        if not self.cards:
+        if not self._left:
             raise ValueError("No quedan cartas en el mazo")
-        card = self.cards.pop()
-        self.dealt_cards.append(card)
-        return card
-    
+        self._left -= 1
+        return self._order[self._left]
+
     def deal_cards(self, count: int) -> List[Card]:
         """Reparte múltiples cartas"""
         return [self.deal_card() for _ in range(count)]
-    
+
     def remaining_cards(self) -> List[Card]:
         """Devuelve las cartas que quedan en el mazo"""
-        return self.cards.copy()
-    
+        return self.cards
+
     def cards_left(self) -> int:
         """Número de cartas restantes"""
-        return len(self.cards)
+        return self._left
+
+    def exchange(self, taken: Sequence[Card], returned: Sequence[Card]):
+        """
+        Saca `taken` de las cartas por repartir y devuelve `returned` (ya repartidas) al mazo,
+        que se baraja de nuevo. Sirve para fijar manos concretas sin repetir cartas después.
+        """
+        taken, returned = tuple(taken), tuple(returned)
+        remaining = [card for card in self._order[:self._left] if card not in taken] + list(returned)
+        dealt = tuple(card for card in self._order[self._left:] if card not in returned)
+        random.shuffle(remaining)
+        # Las cartas sacadas cuentan como las últimas repartidas
+        self._order = tuple(remaining) + taken + dealt
+        self._left = len(remaining)
+
+    def snapshot(self) -> Tuple[Tuple[Card, ...], int]:
+        return self._order, self._left
+
+    def restore(self, state: Tuple[Tuple[Card, ...], int]):
+        self._order, self._left = state
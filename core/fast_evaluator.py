@@ -0,0 +1,231 @@
+"""
+Evaluador de manos basado en tablas precalculadas y evaluación por lotes con numpy.
+
+Cada carta se codifica como entero `rango * 4 + palo` (rango 0..12 para 2..A, palo en el
+orden de `Suit`). Una mano de 5 a 7 cartas se evalúa con dos búsquedas:
+- tabla sin color: multiconjunto de rangos (clave en base 5) -> mejor clase de 5 cartas,
+- tabla de color: máscara de bits de los rangos de un palo -> mejor clase de color.
+El resultado es la "fuerza": el índice de la clase de equivalencia (1..7462 en Hold'em),
+donde un número mayor siempre gana. La tabla incluye además la categoría y la frecuencia
+(número de manos de 5 cartas) de cada clase.
+"""
+from collections import Counter
+from itertools import combinations_with_replacement, permutations
+from math import comb, prod
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from core.card import Card, HandRank, Rank, Suit
+from utils.lazy_tables import LazyTable
+
+SUIT_INDEX = {suit: i for i, suit in enumerate(Suit)}
+RANK_INDEX = {rank: i for i, rank in enumerate(Rank)}
+_RANKS = list(Rank)
+_SUITS = list(Suit)
+_POW5 = np.array([5 ** r for r in range(13)], dtype=np.int64)
+_BITS = np.array([1 << r for r in range(13)], dtype=np.int64)
+
+# Orden de categorías de menor a mayor (la escalera real es la escalera de color más alta)
+HOLDEM_ORDER = (
+    HandRank.HIGH_CARD,
+    HandRank.ONE_PAIR,
+    HandRank.TWO_PAIR,
+    HandRank.THREE_OF_A_KIND,
+    HandRank.STRAIGHT,
+    HandRank.FLUSH,
+    HandRank.FULL_HOUSE,
+    HandRank.FOUR_OF_A_KIND,
+    HandRank.STRAIGHT_FLUSH,
+)
+
+# Short deck (6+): con 36 cartas el color es más raro que el full y lo supera
+SHORT_DECK_ORDER = (
+    HandRank.HIGH_CARD,
+    HandRank.ONE_PAIR,
+    HandRank.TWO_PAIR,
+    HandRank.THREE_OF_A_KIND,
+    HandRank.STRAIGHT,
+    HandRank.FULL_HOUSE,
+    HandRank.FLUSH,
+    HandRank.FOUR_OF_A_KIND,
+    HandRank.STRAIGHT_FLUSH,
+)
+
+
+def card_to_int(card: Card) -> int:
+    return RANK_INDEX[card.rank] * 4 + SUIT_INDEX[card.suit]
+
+
+def int_to_card(code: int) -> Card:
+    return Card(_RANKS[code >> 2], _SUITS[code & 3])
+
+
+def cards_to_ints(cards: Sequence[Card]) -> List[int]:
+    return [card_to_int(card) for card in cards]
+
+
+def canonical_cards(*groups: Sequence[int]) -> Tuple[Tuple[int, ...], ...]:
+    """
+    Forma canónica de varios grupos de cartas (p. ej. mano y board) bajo permutación de palos:
+    situaciones isomorfas (mismos rangos, palos renombrados) comparten la misma clave de caché.
+    """
+    best = None
+    for perm in permutations(range(4)):
+        candidate = tuple(tuple(sorted((c & ~3) | perm[c & 3] for c in group)) for group in groups)
+        if best is None or candidate < best:
+            best = candidate
+    return best
+
+
+def _classify(ranks: Sequence[int], flush: bool, straights: Dict[frozenset, int]):
+    """Categoría y desempate de una mano de 5 cartas dada por sus rangos"""
+    counts = Counter(ranks)
+    groups = sorted(counts.items(), key=lambda rc: (rc[1], rc[0]), reverse=True)
+    shape = tuple(c for _, c in groups)
+    tiebreak = tuple(r for r, _ in groups)
+    straight_high = straights.get(frozenset(ranks)) if len(counts) == 5 else None
+    if straight_high is not None and flush:
+        return HandRank.STRAIGHT_FLUSH, (straight_high,)
+    if shape == (4, 1):
+        return HandRank.FOUR_OF_A_KIND, tiebreak
+    if shape == (3, 2):
+        return HandRank.FULL_HOUSE, tiebreak
+    if flush:
+        return HandRank.FLUSH, tiebreak
+    if straight_high is not None:
+        return HandRank.STRAIGHT, (straight_high,)
+    if shape == (3, 1, 1):
+        return HandRank.THREE_OF_A_KIND, tiebreak
+    if shape == (2, 2, 1):
+        return HandRank.TWO_PAIR, tiebreak
+    if shape == (2, 1, 1, 1):
+        return HandRank.ONE_PAIR, tiebreak
+    return HandRank.HIGH_CARD, tiebreak
+
+
+def _multisets(ranks: Sequence[int], size: int):
+    for ms in combinations_with_replacement(ranks, size):
+        if max(Counter(ms).values()) <= 4:
+            yield ms
+
+
+def build_eval_tables(ranks: Sequence[int], order: Sequence[HandRank]) -> Dict[str, np.ndarray]:
+    """
+    Construye las tablas de evaluación para una baraja con los rangos `ranks` (ascendentes y
+    consecutivos) y el orden de categorías `order`. La escalera baja usa el As con los cuatro
+    rangos inferiores (A-2-3-4-5, o A-6-7-8-9 en short deck).
+    """
+    ranks = list(ranks)
+    straights = {frozenset(ranks[i:i + 5]): ranks[i + 4] for i in range(len(ranks) - 4)}
+    straights[frozenset([ranks[-1]] + ranks[:4])] = ranks[3]  # Escalera baja con As
+    position = {category: i for i, category in enumerate(order)}
+
+    def key(ms, flush):
+        category, tiebreak = _classify(ms, flush, straights)
+        return position[category], tiebreak, category
+
+    five = {}
+    for ms in _multisets(ranks, 5):
+        five[(ms, False)] = key(ms, False)
+        if len(set(ms)) == 5:
+            five[(ms, True)] = key(ms, True)
+    ordered = sorted(set(five.values()))
+    strength = {k: i + 1 for i, k in enumerate(ordered)}
+    categories = np.zeros(len(ordered) + 1, dtype=np.int8)
+    for k, s in strength.items():
+        categories[s] = k[2].value
+    frequencies = np.zeros(len(ordered) + 1, dtype=np.int64)
+    for (ms, flush), k in five.items():
+        if flush:
+            frequencies[strength[k]] += 4
+        elif len(set(ms)) == 5:
+            frequencies[strength[k]] += 4 ** 5 - 4
+        else:
+            frequencies[strength[k]] += prod(comb(4, c) for c in Counter(ms).values())
+    if categories[-1] == HandRank.STRAIGHT_FLUSH.value:
+        categories[-1] = HandRank.ROYAL_FLUSH.value
+
+    # Tabla sin color: multiconjuntos de 5, 6 y 7 rangos
+    nonflush = {ms: strength[five[(ms, False)]] for ms in _multisets(ranks, 5)}
+    for size in (6, 7):
+        for ms in _multisets(ranks, size):
+            nonflush[ms] = max(
+                nonflush[ms[:i] + ms[i + 1:]] for i in range(size) if i == 0 or ms[i] != ms[i - 1]
+            )
+    keys = np.array([sum(5 ** r for r in ms) for ms in nonflush], dtype=np.int64)
+    values = np.array(list(nonflush.values()), dtype=np.int16)
+    sort = np.argsort(keys)
+
+    # Tabla de color: máscaras de 5 a 7 bits
+    flush_values = np.zeros(1 << 13, dtype=np.int16)
+    masks = sorted(range(1 << 13), key=lambda m: bin(m).count("1"))
+    for mask in masks:
+        bits = [r for r in range(13) if mask >> r & 1]
+        if len(bits) < 5 or len(bits) > 7 or any(r not in ranks for r in bits):
+            continue
+        if len(bits) == 5:
+            flush_values[mask] = strength[five[(tuple(bits), True)]]
+        else:
+            flush_values[mask] = max(flush_values[mask & ~(1 << r)] for r in bits)
+
+    return {
+        "nonflush_keys": keys[sort],
+        "nonflush_values": values[sort],
+        "flush_values": flush_values,
+        "categories": categories,
+        "frequencies": frequencies,
+    }
+
+
+HOLDEM_TABLE = LazyTable("holdem_eval", lambda: build_eval_tables(range(13), HOLDEM_ORDER), version=2)
+SHORT_DECK_TABLE = LazyTable("short_deck_eval", lambda: build_eval_tables(range(4, 13), SHORT_DECK_ORDER))
+
+
+class FastEvaluator:
+    """
+    Evaluador por lotes respaldado por una LazyTable.
+    `evaluate_batch` recibe un array (N, k) de cartas codificadas, con 5 <= k <= 7.
+    """
+
+    def __init__(self, table: LazyTable = HOLDEM_TABLE):
+        self.table = table
+
+    def evaluate_batch(self, cards) -> np.ndarray:
+        tables = self.table.get()
+        cards = np.asarray(cards, dtype=np.int64)
+        ranks = cards >> 2
+        suits = cards & 3
+        keys = _POW5[ranks].sum(axis=1)
+        idx = np.searchsorted(tables["nonflush_keys"], keys)
+        result = np.asarray(tables["nonflush_values"])[idx].astype(np.int32)
+        flush_values = tables["flush_values"]
+        bits = _BITS[ranks]
+        for suit in range(4):
+            masks = np.where(suits == suit, bits, 0).sum(axis=1)
+            np.maximum(result, flush_values[masks], out=result)
+        return result
+
+    def evaluate(self, cards: Sequence[Card]) -> int:
+        """Fuerza de una sola mano de 5 a 7 cartas"""
+        return int(self.evaluate_batch([cards_to_ints(cards)])[0])
+
+    def hand_rank(self, strength: int) -> HandRank:
+        """Categoría (HandRank) de una fuerza devuelta por el evaluador"""
+        return HandRank(int(self.table["categories"][strength]))
+
+    @property
+    def num_classes(self) -> int:
+        return len(self.table["categories"]) - 1
+
+    def class_percentile(self, strength: int) -> float:
+        """
+        Percentil medio de la clase `strength` entre todas las manos de 5 cartas: fracción de
+        manos estrictamente peores más la mitad de las de su misma clase (los empates cuentan a medias)
+        """
+        frequencies = np.asarray(self.table["frequencies"])
+        return float(frequencies[:strength].sum() + frequencies[strength] / 2) / float(frequencies.sum())
+
+
+HOLDEM_EVALUATOR = FastEvaluator(HOLDEM_TABLE)
+SHORT_DECK_EVALUATOR = FastEvaluator(SHORT_DECK_TABLE)
@@ -1,9 +1,13 @@
 # Lógica principal del juego de póker Texas Hold'em
+import threading
+from collections import OrderedDict
 from enum import Enum, auto
-from typing import List, Optional
+from itertools import count
+from typing import List, NamedTuple, Optional, Sequence, Tuple
 from core.deck import Deck
-from core.player import Player
+from core.player import Player, PlayerState
 from core.card import Card
+from core.variants import GameVariant, HOLDEM
 
 class GameStage(Enum):
     PRE_FLOP = auto()
@@ -12,16 +16,56 @@ class GameStage(Enum):
     RIVER = auto()
     SHOWDOWN = auto()
 
+# Número de versiones serializadas que se conservan para responder con deltas
+STATE_HISTORY_SIZE = 32
+
+_game_ids = count(1)
+
+
+class GameSnapshot(NamedTuple):
+    """Instantánea inmutable de una mesa: solo referencias a estados que nunca se modifican"""
+    variant: GameVariant
+    stage: GameStage
+    community_cards: Tuple[Card, ...]
+    deck: tuple
+    players: Tuple[PlayerState, ...]
+    current_player_idx: int
+    version: int
+
+
 class PokerGame:
     """
     Clase principal que gestiona el flujo del juego de póker, siguiendo principios SOLID y POO.
+
+    El estado está versionado: cada mutación del juego o de un jugador incrementa `version`,
+    y el estado serializado se cachea por (versión, formato) para no reconstruirlo en cada petición.
+
+    Las mutaciones y la serialización se hacen bajo un cerrojo por mesa: sin él, una petición
+    concurrente podría cachear el estado previo a una mutación con la versión nueva (y con ella
+    su ETag y los deltas que partan de esa versión).
+
+    El estado de la mesa es compacto (`__slots__`, cartas compartidas y tuplas inmutables), de modo
+    que `snapshot()`/`restore()` son O(1) por asiento y `fork()` ramifica una mesa para análisis
+    hipotéticos sin copiar cartas ni mazo: cada rama sustituye sus tuplas al escribir.
     """
-    def __init__(self, num_players: int, player_names: Optional[List[str]] = None):
+    __slots__ = ("variant", "game_id", "_lock", "_version", "_state_cache", "deck", "players", "_community",
+                 "stage", "current_player_idx", "num_players")
+
+    def __init__(self, num_players: int, player_names: Optional[List[str]] = None,
+                 variant: GameVariant = HOLDEM):
         if not 2 <= num_players <= 10:
             raise ValueError("El número de jugadores debe estar entre 2 y 10")
-        self.deck = Deck()
+        if num_players * variant.hole_cards + 5 > len(variant.ranks) * 4:
+            raise ValueError(f"Demasiados jugadores para {variant.label}")
+        self.variant = variant
+        self.game_id = next(_game_ids)
+        self._lock = threading.RLock()
+        self._version = 0
+        # Se crea con la primera serialización: muchas mesas nunca se serializan
+        self._state_cache: "Optional[OrderedDict[tuple, dict]]" = None
+        self.deck = Deck(variant.ranks)
         self.players: List[Player] = []
-        self.community_cards: List[Card] = []
+        self._community: Tuple[Card, ...] = ()
         self.stage = GameStage.PRE_FLOP
         self.current_player_idx = 0
         self.num_players = num_players
@@ -33,56 +77,202 @@ class PokerGame:
             name = player_names[i] if player_names and i < len(player_names) else f"Jugador {i+1}"
             self.players.append(Player(name))
 
+    @property
+    def version(self) -> int:
+        """Versión actual del estado; crece con cada mutación del juego o de sus jugadores"""
+        return self._version + sum(player.version for player in self.players)
+
+    def _touch(self):
+        self._version += 1
+
+    @property
+    def community_cards(self) -> Tuple[Card, ...]:
+        return self._community
+
+    @community_cards.setter
+    def community_cards(self, cards: Sequence[Card]):
+        with self._lock:
+            self._community = tuple(cards)
+            self._touch()
+
+    def snapshot(self) -> GameSnapshot:
+        """Instantánea O(1) por asiento del estado de la mesa (comparte cartas y mazo)"""
+        with self._lock:
+            return GameSnapshot(self.variant, self.stage, self._community, self.deck.snapshot(),
+                                tuple(player.snapshot() for player in self.players),
+                                self.current_player_idx, self._version)
+
+    def restore(self, snapshot: GameSnapshot):
+        """
+        Vuelve al estado de `snapshot`. La versión nunca retrocede: el estado restaurado recibe
+        una versión nueva para que la caché de serialización, los ETags y los deltas sigan siendo válidos.
+        """
+        if len(snapshot.players) != self.num_players:
+            raise ValueError("La instantánea corresponde a una mesa con otro número de jugadores")
+        with self._lock:
+            previous = self.version
+            self.variant = snapshot.variant
+            self.stage = snapshot.stage
+            self._community = snapshot.community_cards
+            self.deck.ranks = tuple(snapshot.variant.ranks)
+            self.deck.restore(snapshot.deck)
+            for player, state in zip(self.players, snapshot.players):
+                player.restore(state)
+            self.current_player_idx = snapshot.current_player_idx
+            self._version = snapshot.version
+            self._version += previous + 1 - self.version
+
+    def fork(self) -> "PokerGame":
+        """Mesa nueva e independiente que parte del estado actual, sin copiar cartas"""
+        snapshot = self.snapshot()
+        clone = PokerGame.__new__(PokerGame)
+        clone.variant = snapshot.variant
+        clone.game_id = next(_game_ids)
+        clone._lock = threading.RLock()
+        clone._state_cache = None
+        clone.deck = Deck.__new__(Deck)
+        clone.deck.ranks = self.deck.ranks
+        clone.deck.restore(snapshot.deck)
+        clone.players = [Player.from_state(state) for state in snapshot.players]
+        clone._community = snapshot.community_cards
+        clone.stage = snapshot.stage
+        clone.current_player_idx = snapshot.current_player_idx
+        clone.num_players = self.num_players
+        clone._version = snapshot.version
+        return clone
+
     def start_new_hand(self):
-        self.deck.reset()
-        self.community_cards = []
-        self.stage = GameStage.PRE_FLOP
-        for player in self.players:
-            player.reset_hand()
-        self.deal_hole_cards()
+        with self._lock:
+            self.deck.reset()
+            self._community = ()
+            self.stage = GameStage.PRE_FLOP
+            for player in self.players:
+                player.reset_hand()
+            self.deal_hole_cards()
+            self._touch()
 
     def deal_hole_cards(self):
-        for player in self.players:
-            player.hand = self.deck.deal_cards(2)
+        with self._lock:
+            for player in self.players:
+                player.hand = self.deck.deal_cards(self.variant.hole_cards)
 
     def deal_flop(self):
-        if self.stage != GameStage.PRE_FLOP:
-            raise Exception("No se puede repartir el flop en esta etapa")
-        self.community_cards = self.deck.deal_cards(3)
-        self.stage = GameStage.FLOP
+        with self._lock:
+            if self.stage != GameStage.PRE_FLOP:
+                raise Exception("No se puede repartir el flop en esta etapa")
+            self._community = tuple(self.deck.deal_cards(3))
+            self.stage = GameStage.FLOP
+            self._touch()
 
     def deal_turn(self):
-        if self.stage != GameStage.FLOP:
-            raise Exception("No se puede repartir el turn en esta etapa")
-        self.community_cards.append(self.deck.deal_card())
-        self.stage = GameStage.TURN
+        with self._lock:
+            if self.stage != GameStage.FLOP:
+                raise Exception("No se puede repartir el turn en esta etapa")
+            self._community += (self.deck.deal_card(),)
+            self.stage = GameStage.TURN
+            self._touch()
 
     def deal_river(self):
-        if self.stage != GameStage.TURN:
-            raise Exception("No se puede repartir el river en esta etapa")
-        self.community_cards.append(self.deck.deal_card())
-        self.stage = GameStage.RIVER
+        with self._lock:
+            if self.stage != GameStage.TURN:
+                raise Exception("No se puede repartir el river en esta etapa")
+            self._community += (self.deck.deal_card(),)
+            self.stage = GameStage.RIVER
+            self._touch()
 
     def next_stage(self):
-        if self.stage == GameStage.PRE_FLOP:
-            self.deal_flop()
-        elif self.stage == GameStage.FLOP:
-            self.deal_turn()
-        elif self.stage == GameStage.TURN:
-            self.deal_river()
-        elif self.stage == GameStage.RIVER:
-            self.stage = GameStage.SHOWDOWN
-        else:
-            raise Exception("El juego ya está en showdown.")
-
-    def get_game_state(self) -> dict:
+        with self._lock:
+            if self.stage == GameStage.PRE_FLOP:
+                self.deal_flop()
+            elif self.stage == GameStage.FLOP:
+                self.deal_turn()
+            elif self.stage == GameStage.TURN:
+                self.deal_river()
+            elif self.stage == GameStage.RIVER:
+                self.stage = GameStage.SHOWDOWN
+                self._touch()
+            else:
+                raise Exception("El juego ya está en showdown.")
+
+    def set_player_hand(self, player_idx: int, cards: List[Card]):
+        """
+        Asigna una mano concreta a un jugador (análisis de manos personalizadas). Las cartas no
+        pueden estar en el board ni en otra mano; salen del mazo y la mano anterior vuelve a él.
+        """
+        with self._lock:
+            cards = list(cards)
+            in_use = set(self._community).union(*(player.hand for i, player in enumerate(self.players)
+                                                   if i != player_idx))
+            if len(set(cards)) != len(cards) or in_use.intersection(cards):
+                raise ValueError("Las cartas ya están en el board o en la mano de otro jugador")
+            old = self.players[player_idx].hand
+            self.deck.exchange([card for card in cards if card not in old],
+                               [card for card in old if card not in cards])
+            self.players[player_idx].hand = cards
+
+    def get_game_state(self, compact: bool = False) -> dict:
+        """
+        Devuelve el estado serializado de la versión actual.
+        Con `compact=True` las cartas se codifican como cadenas ('AhKd' -> ['Ah', 'Kd']).
+        El diccionario devuelto se comparte entre llamadas de la misma versión: no mutarlo.
+        """
+        with self._lock:
+            key = (self.version, compact)
+            if self._state_cache is None:
+                self._state_cache = OrderedDict()
+            state = self._state_cache.get(key)
+            if state is None:
+                state = self._build_state(key[0], compact)
+                self._state_cache[key] = state
+                while len(self._state_cache) > 2 * STATE_HISTORY_SIZE:
+                    self._state_cache.popitem(last=False)
+            return state
+
+    def get_state_delta(self, since_version: int, compact: bool = False) -> dict:
+        """
+        Devuelve solo lo que cambió desde `since_version`. Si esa versión ya no está
+        en el historial (o es futura) se devuelve el estado completo con "delta": False.
+        """
+        with self._lock:
+            current = self.get_game_state(compact)
+            base = self._state_cache.get((since_version, compact))
+        if base is None or since_version > current["version"]:
+            return dict(current, delta=False)
+        changes = {}
+        for field in ("stage", "community_cards"):
+            if base[field] != current[field]:
+                changes[field] = current[field]
+        players = {}
+        for idx, (old, new) in enumerate(zip(base["players"], current["players"])):
+            diff = {k: v for k, v in new.items() if old.get(k) != v}
+            if diff:
+                players[str(idx)] = diff
+        if players:
+            changes["players"] = players
+        return {
+            "version": current["version"],
+            "base_version": since_version,
+            "delta": True,
+            "changes": changes,
+        }
+
+    def state_etag(self, compact: bool = False, version: Optional[int] = None) -> str:
+        """Identificador del estado serializado (de `version`, por defecto la actual) apto para cabeceras ETag"""
+        with self._lock:
+            version = self.version if version is None else version
+            return f"{self.game_id}-{version}-{'c' if compact else 'f'}"
+
+    def _build_state(self, version: int, compact: bool) -> dict:
+        encode = (lambda card: card.to_compact()) if compact else (lambda card: card.to_dict())
         return {
+            "version": version,
+            "variant": self.variant.name,
             "stage": self.stage.name,
-            "community_cards": [card.to_dict() for card in self.community_cards],
+            "community_cards": [encode(card) for card in self.community_cards],
             "players": [
                 {
                     "name": player.name,
-                    "hand": [card.to_dict() for card in player.hand],
+                    "hand": [encode(card) for card in player.hand],
                 } for player in self.players
             ]
         }
@@ -1,47 +1,98 @@
 # Clase para los jugadores de Texas Hold'em
-from typing import List
+from typing import NamedTuple, Sequence, Tuple
 from core.card import Card
 
+
+class PlayerState(NamedTuple):
+    """Estado inmutable de un asiento; las instantáneas lo comparten sin copiarlo"""
+    name: str
+    chips: int
+    hand: Tuple[Card, ...] = ()
+    current_bet: int = 0
+    active: bool = True
+    folded: bool = False
+    version: int = 0
+
+
+def _field(name: str, doc: str) -> property:
+    def get(self):
+        return getattr(self._state, name)
+
+    def set(self, value):
+        self._update(**{name: value})
+
+    return property(get, set, doc=doc)
+
+
 class Player:
     """
     Representa a un jugador de póker, siguiendo principios SOLID y POO.
+    Cada mutación incrementa `version`, que PokerGame usa para invalidar el estado serializado.
+
+    El estado vive en una única tupla inmutable (`PlayerState`) que se sustituye en cada
+    mutación (copia en escritura): `snapshot()` y `restore()` son O(1) y no copian cartas.
     """
+    __slots__ = ("_state",)
+
+    name = _field("name", "Nombre del jugador")
+    chips = _field("chips", "Fichas disponibles")
+    current_bet = _field("current_bet", "Apuesta acumulada en la mano")
+    active = _field("active", "Activo en la mano actual")
+    folded = _field("folded", "Si el jugador se ha retirado")
+
     def __init__(self, name: str, chips: int = 1000):
-        self.name = name
-        self.hand: List[Card] = []
-        self.active: bool = True  # Activo en la mano actual
-        self.chips: int = chips   # Fichas disponibles
-        self.current_bet: int = 0 # Apuesta actual en la ronda
-        self.folded: bool = False # Si el jugador se ha retirado
-
-    def receive_cards(self, cards: List[Card]):
+        self._state = PlayerState(name, chips)
+
+    @classmethod
+    def from_state(cls, state: PlayerState) -> "Player":
+        player = cls.__new__(cls)
+        player._state = state
+        return player
+
+    def _update(self, **changes):
+        self._state = self._state._replace(version=self._state.version + 1, **changes)
+
+    @property
+    def version(self) -> int:
+        return self._state.version
+
+    @property
+    def hand(self) -> Tuple[Card, ...]:
+        return self._state.hand
+
+    @hand.setter
+    def hand(self, cards: Sequence[Card]):
+        self._update(hand=tuple(cards))
+
+    def snapshot(self) -> PlayerState:
+        return self._state
+
+    def restore(self, state: PlayerState):
+        self._state = state
+
+    def receive_cards(self, cards: Sequence[Card]):
         self.hand = cards
 
     def reset_hand(self):
-        self.hand = []
-        self.active = True
-        self.current_bet = 0
-        self.folded = False
+        self._update(hand=(), active=True, current_bet=0, folded=False)
 
     def bet(self, amount: int):
         if amount > self.chips:
             raise ValueError(f"{self.name} no tiene suficientes fichas para apostar {amount}.")
-        self.chips -= amount
-        self.current_bet += amount
+        self._update(chips=self.chips - amount, current_bet=self.current_bet + amount)
 
     def fold(self):
-        self.folded = True
-        self.active = False
+        self._update(folded=True, active=False)
 
     def is_active(self) -> bool:
         return self.active and not self.folded
 
-    def get_state(self) -> dict:
+    def get_state(self, compact: bool = False) -> dict:
         return {
             "name": self.name,
             "chips": self.chips,
             "current_bet": self.current_bet,
-            "hand": [card.to_dict() for card in self.hand],
+            "hand": [card.to_compact() if compact else card.to_dict() for card in self.hand],
             "active": self.active,
             "folded": self.folded,
         }
@@ -0,0 +1,100 @@
+"""
+Variantes de juego: cada una define su baraja, cuántas cartas propias recibe cada jugador,
+la regla de evaluación y el orden de categorías (a través de la tabla de su evaluador).
+
+- Texas Hold'em: 52 cartas, 2 cartas propias, mejor mano con cualquier combinación de 5.
+- Omaha (PLO): 52 cartas, 4 cartas propias, exactamente 2 propias + 3 comunitarias
+  (60 combinaciones con el board completo, evaluadas en un solo lote con índices precalculados).
+- Short deck (6+): 36 cartas (6 a As), el color gana al full y A-6-7-8-9 es escalera.
+
+El evaluador (numpy y tablas) se importa al primer uso para no penalizar el arranque en frío.
+"""
+from functools import lru_cache
+from itertools import combinations
+from typing import Dict, List, Optional, Sequence
+
+from core.card import Card, Rank, Suit
+
+
+class GameVariant:
+    """Definición de una variante de póker"""
+
+    def __init__(self, name: str, label: str, ranks: Sequence[Rank], hole_cards: int,
+                 hole_used: Optional[int], evaluator_name: str):
+        self.name = name
+        self.label = label
+        self.ranks = list(ranks)
+        self.hole_cards = hole_cards
+        self.hole_used = hole_used  # None: cualquier combinación; n: exactamente n cartas propias
+        self.evaluator_name = evaluator_name
+
+    def __repr__(self):
+        return f"GameVariant({self.name})"
+
+    def deck_cards(self) -> List[Card]:
+        """Cartas de una baraja completa de la variante"""
+        return [Card(rank, suit) for rank in self.ranks for suit in Suit]
+
+    def deck_ints(self) -> List[int]:
+        """Baraja completa con las cartas codificadas como enteros (ver core.fast_evaluator)"""
+        first = list(Rank).index(self.ranks[0])
+        return list(range(first * 4, (first + len(self.ranks)) * 4))
+
+    @property
+    def evaluator(self):
+        from core import fast_evaluator
+        return getattr(fast_evaluator, self.evaluator_name)
+
+    def combinations_per_hand(self, board_size: int = 5) -> int:
+        """Evaluaciones de 5 cartas necesarias por mano (1 si basta una búsqueda de 5 a 7 cartas)"""
+        if self.hole_used is None:
+            return 1
+        return len(combination_indexes(self.hole_cards, board_size, self.hole_used))
+
+    def evaluate_batch(self, hole, board):
+        """
+        Fuerza de N manos: `hole` es (N, hole_cards) y `board` (N, 3..5), ambos codificados.
+        Con `hole_used` se evalúan todas las combinaciones válidas de una vez y se toma la mejor.
+        """
+        import numpy as np
+        hole = np.asarray(hole, dtype=np.int64)
+        board = np.asarray(board, dtype=np.int64)
+        cards = np.hstack([hole, board])
+        if self.hole_used is None:
+            return self.evaluator.evaluate_batch(cards)
+        idx = combination_indexes(hole.shape[1], board.shape[1], self.hole_used)
+        strengths = self.evaluator.evaluate_batch(cards[:, idx].reshape(-1, 5))
+        return strengths.reshape(len(cards), len(idx)).max(axis=1)
+
+    def evaluate(self, hole: Sequence[Card], board: Sequence[Card]) -> int:
+        from core.fast_evaluator import cards_to_ints
+        return int(self.evaluate_batch([cards_to_ints(hole)], [cards_to_ints(board)])[0])
+
+
+@lru_cache(maxsize=None)
+def combination_indexes(hole_size: int, board_size: int, hole_used: int):
+    """
+    Índices (C, 5) sobre la fila [cartas propias | board] de todas las manos de 5 cartas que usan
+    exactamente `hole_used` cartas propias. Omaha con board completo: C(4,2) * C(5,3) = 60.
+    """
+    import numpy as np
+    rows = [
+        list(h) + [hole_size + b for b in bs]
+        for h in combinations(range(hole_size), hole_used)
+        for bs in combinations(range(board_size), 5 - hole_used)
+    ]
+    return np.array(rows, dtype=np.int64)
+
+
+HOLDEM = GameVariant("holdem", "Texas Hold'em", list(Rank), 2, None, "HOLDEM_EVALUATOR")
+OMAHA = GameVariant("omaha", "Pot-Limit Omaha", list(Rank), 4, 2, "HOLDEM_EVALUATOR")
+SHORT_DECK = GameVariant("short_deck", "Short Deck (6+)", list(Rank)[4:], 2, None, "SHORT_DECK_EVALUATOR")
+
+VARIANTS: Dict[str, GameVariant] = {variant.name: variant for variant in (HOLDEM, OMAHA, SHORT_DECK)}
+
+
+def get_variant(name: str) -> GameVariant:
+    try:
+        return VARIANTS[name]
+    except KeyError:
+        raise ValueError(f"Variante desconocida: {name}. Opciones: {', '.join(VARIANTS)}")
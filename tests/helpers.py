@@ -0,0 +1,8 @@
+"""Utilidades compartidas por las pruebas"""
+from core.card import Card
+from core.fast_evaluator import cards_to_ints
+
+
+def card_ints(*codes: str) -> tuple:
+    """Cartas en notación compacta ('Ah', 'Td'...) codificadas como enteros"""
+    return tuple(cards_to_ints([Card.from_compact(code) for code in codes]))
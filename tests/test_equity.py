@@ -0,0 +1,111 @@
+import itertools
+
+import numpy as np
+
+import app as app_module
+from core.card import HandRank
+from core.fast_evaluator import HOLDEM_EVALUATOR
+from core.game import PokerGame
+from tests.helpers import card_ints
+from utils.assistant import PokerAssistant
+from utils.equity import all_seats_equity
+from utils.hand_potential import hand_potential
+from utils.hand_strength import hand_strength
+
+
+def test_five_card_category_counts():
+    hands = np.array(list(itertools.combinations(range(52), 5)), dtype=np.int8)
+    strengths = HOLDEM_EVALUATOR.evaluate_batch(hands)
+    assert HOLDEM_EVALUATOR.num_classes == len(np.unique(strengths)) == 7462
+    counts = np.bincount(np.asarray(HOLDEM_EVALUATOR.table["categories"])[strengths])
+    assert counts[HandRank.ONE_PAIR.value] == 1098240
+    assert counts[HandRank.FLUSH.value] == 5108
+    assert counts[HandRank.FULL_HOUSE.value] == 3744
+    assert counts[HandRank.ROYAL_FLUSH.value] == 4
+
+
+def test_known_hands_river_is_exact():
+    board = card_ints("Ah", "Kd", "7c", "2s", "3h")
+    result = all_seats_equity([card_ints("As", "Qd"), card_ints("Kh", "Kc"), card_ints("Ad", "Qc")], board)
+    assert result["method"] == "enumeration" and result["runouts"] == 1
+    assert [seat["equity"] for seat in result["seats"]] == [0.0, 1.0, 0.0]
+
+
+def test_all_seats_equity_sums_to_one():
+    game = PokerGame(4)
+    game.start_new_hand()
+    game.deal_flop()
+    game.players[2].fold()
+    equity = PokerAssistant(game, 1).calculate_all_seats_equity(known_hands=True)
+    assert equity["method"] == "enumeration" and equity["runouts"] == 820
+    assert abs(sum(seat["equity"] for seat in equity["seats"]) - 1) < 1e-9
+    assert equity["seats"][2]["equity"] == 0.0 and not equity["seats"][2]["active"]
+    hidden = PokerAssistant(game, 1).calculate_all_seats_equity(known_hands=False, simulations=200)
+    assert hidden["method"] == "monte_carlo" and not hidden["seats"][0]["known"]
+
+
+def test_hand_strength_counts_every_opponent_holding():
+    nuts = hand_strength(card_ints("Ah", "Kh"), card_ints("Qh", "Jh", "Th"))
+    assert nuts["combinations"] == 1081 and nuts["beats"] == 1.0
+    board = card_ints("Ah", "Kd", "7c", "2s", "3h")
+    weak = hand_strength(card_ints("4d", "5d"), board)
+    assert weak["strength_percentile"] > 0.9
+    isomorphic = hand_strength(card_ints("4s", "5s"), card_ints("Ac", "Ks", "7d", "2h", "3c"))
+    assert isomorphic == weak
+    assert 0 < weak["class_percentile"] < 1
+
+
+def test_hand_potential_separates_draws_from_made_hands():
+    draw = hand_potential(card_ints("Ah", "Kh"), card_ints("2h", "7h", "Qc"))
+    made = hand_potential(card_ints("Qs", "Qd"), card_ints("Qh", "7c", "2d"))
+    assert draw["method"] == "enumeration" and draw["ppot"] > made["ppot"]
+    assert made["hand_strength"] > 0.99 and made["npot"] < draw["npot"]
+    sampled = hand_potential(card_ints("5h", "6h"), card_ints("7h", "8c", "Kd"), max_evaluations=100000)
+    assert sampled["method"] == "monte_carlo" and sampled["evaluations"] <= 101081
+    river = hand_potential(card_ints("5h", "6h"), card_ints("7h", "8c", "Kd", "9s", "2c"))
+    assert river["ppot"] == river["npot"] == 0.0
+
+
+def test_invalid_input_returns_errors_and_simulations_are_bounded():
+    game = PokerGame(3)
+    game.start_new_hand()
+    game.deal_flop()
+    game.players[2].reset_hand()
+    result = PokerAssistant(game, 0).predict_winning_probability(known_hands=True)
+    assert "no tiene cartas" in result["error"]
+
+    client = app_module.app.test_client()
+    client.post("/new_game", json={"num_players": 3})
+    response = client.post("/equity", json={"known_hands": False, "simulations": 10 ** 9})
+    assert response.status_code == 200
+    assert response.get_json()["analysis"]["runouts"] <= app_module.MAX_EQUITY_SIMULATIONS
+
+
+def test_ehs2_is_adjusted_for_opponents():
+    hero, board = card_ints("Ah", "Kh"), card_ints("2h", "7h", "Qc")
+    heads_up = hand_potential(hero, board)
+    three_way = hand_potential(hero, board, num_opponents=3)
+    assert three_way["hand_strength"] == heads_up["hand_strength"] ** 3
+    assert three_way["ehs2"] < heads_up["ehs2"]
+    river = hand_potential(hero, board + card_ints("9s", "2c"), num_opponents=2)
+    assert abs(river["ehs2"] - river["hand_strength"] ** 2) < 1e-12
+
+
+def test_suggestion_uses_pot_odds(monkeypatch):
+    game = PokerGame(2)
+    game.start_new_hand()
+    game.deal_flop()
+    assistant = PokerAssistant(game, 0)
+    # Proyecto con 35% de equity: sin pot odds la sugerencia queda condicionada
+    monkeypatch.setattr(assistant, "predict_winning_probability", lambda: {"win_percentage": 35.0})
+    monkeypatch.setattr(assistant, "calculate_hand_potential", lambda **kwargs: {
+        "hand_strength": 0.3, "ppot": 0.3, "npot": 0.05, "ehs": 0.4, "ehs2": 0.2})
+    assert assistant.suggest_best_action()["action"] == "CALL si las odds son favorables"
+    cheap = assistant.suggest_best_action(pot_odds=0.25)
+    assert cheap["action"] == "CALL (Igualar)" and cheap["additional_info"]["pot_odds"] == 25.0
+    assert assistant.suggest_best_action(pot_odds=0.45)["action"] == "FOLD (Retirarse)"
+    assert "error" in assistant.suggest_best_action(pot_odds=1.5)
+
+    client = app_module.app.test_client()
+    client.post("/new_game", json={"num_players": 2})
+    assert client.post("/analyze_hand", json={"player_idx": 0, "pot_odds": -0.1}).status_code == 400
@@ -0,0 +1,51 @@
+import numpy as np
+from sklearn.ensemble import GradientBoostingRegressor
+
+from core.game import PokerGame
+from utils import equity_model
+from utils.assistant import PokerAssistant
+from utils.equity_model import EquityModel, _Trees, approximate_equity, fit_equity_model, generate_samples
+
+
+def test_compiled_trees_match_sklearn():
+    rng = np.random.default_rng(0)
+    X = rng.random((400, 4))
+    y = np.sin(X[:, 0] * 3) + X[:, 1] * X[:, 2]
+    deep = GradientBoostingRegressor(n_estimators=30, max_depth=4, random_state=0).fit(X, y)
+    shallow = GradientBoostingRegressor(n_estimators=10, max_depth=2, random_state=0).fit(X, y)
+    assert np.allclose(_Trees.from_sklearn(deep).predict(X), deep.predict(X))
+    joint = _Trees.concat(_Trees.from_sklearn(deep), _Trees.from_sklearn(shallow)).tree_values(X)
+    assert np.allclose(joint[:, 30:].sum(axis=1) + _Trees.from_sklearn(shallow).init, shallow.predict(X))
+
+
+def test_training_pipeline_and_fallback(tmp_path, monkeypatch):
+    X, y = generate_samples(200, simulations=200, seed=3)
+    model = fit_equity_model(X, y, label_simulations=200, n_estimators=20)
+    path = str(tmp_path / "equity_model.npz")
+    model.save(path)
+    loaded = EquityModel.load(path)
+    assert loaded.calibration == model.calibration
+    assert {"mae", "coverage", "served_fraction", "error_scale"} <= set(loaded.calibration)
+
+    hero, board = [48, 49], [0, 17, 34]
+    assert approximate_equity(hero, board, 2, tolerance=0.0, model=loaded) is None
+    approximation = approximate_equity(hero, board, 2, tolerance=1.0, model=loaded)
+    assert approximation["method"] == "model" and 0 <= approximation["equity"] <= 1
+
+    game = PokerGame(3)
+    game.start_new_hand()
+    game.deal_flop()
+    assistant = PokerAssistant(game, 0)
+    monkeypatch.setattr(equity_model, "load_model", lambda: loaded)
+    served = assistant.predict_winning_probability(2, tolerance=1.0)
+    assert served["method"] == "model"
+    assert served["tie_probability"] == 0.0 and served["tie_estimated"] is False
+    assert assistant.predict_winning_probability(2, tolerance=0.0)["method"] != "model"
+    assert assistant.predict_winning_probability(2, tolerance=None)["method"] != "model"
+
+
+def test_packaged_model_loads():
+    # El modelo se despliega desde data/models: producción no debe caer siempre en la simulación
+    model = EquityModel.load(equity_model.MODEL_PATH)
+    equity, bound = model.predict([48, 49], [0, 17, 34], 2)
+    assert 0 <= equity <= 1 and bound > 0
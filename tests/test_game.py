@@ -1,4 +1,123 @@
 # Pruebas unitarias para el juego
+import threading
+
+import pytest
+
+import app as app_module
+from core.card import Card, Rank, Suit
+from core.deck import Deck
+from core.game import PokerGame
+
 
 def test_placeholder():
     assert True  # Reemplaza con pruebas reales
+
+
+def test_state_cached_per_version():
+    game = PokerGame(2)
+    game.start_new_hand()
+    state = game.get_game_state()
+    assert game.get_game_state() is state
+    game.deal_flop()
+    assert game.get_game_state()["version"] > state["version"]
+
+
+def test_compact_cards_and_delta():
+    game = PokerGame(2)
+    game.start_new_hand()
+    base = game.get_game_state(compact=True)
+    hand = game.deck.cards[:2]
+    game.set_player_hand(0, hand)
+    delta = game.get_state_delta(base["version"], compact=True)
+    assert delta["delta"] is True
+    assert delta["changes"] == {"players": {"0": {"hand": [card.to_compact() for card in hand]}}}
+    assert Card.from_compact("Td") == Card(Rank.TEN, Suit.DIAMONDS)
+    assert game.get_state_delta(-1)["delta"] is False
+
+
+def test_snapshot_restore_and_fork_share_state():
+    game = PokerGame(3)
+    game.start_new_hand()
+    game.players[0].bet(100)
+    snapshot = game.snapshot()
+    state = game.get_game_state(compact=True)
+    hand = game.players[1].hand
+
+    game.players[1].fold()
+    game.deal_flop()
+    game.deal_turn()
+    version = game.version
+    game.restore(snapshot)
+    assert game.version > version
+    restored = game.get_game_state(compact=True)
+    assert restored["community_cards"] == state["community_cards"] == []
+    assert restored["players"] == state["players"]
+    assert game.players[1].hand is hand and not game.players[1].folded
+    assert game.players[0].chips == 900 and game.deck.cards_left() == 52 - 6
+
+    branch = game.fork()
+    branch.deal_flop()
+    branch.players[2].bet(50)
+    assert game.community_cards == () and game.players[2].chips == 1000
+    assert branch.players[0].hand is game.players[0].hand
+    game.deal_flop()
+    # Ambas ramas parten del mismo mazo: el flop es el mismo
+    assert game.community_cards == branch.community_cards
+    assert game.state_etag() != branch.state_etag()
+
+
+
+class _InterleavedDeck(Deck):
+    """Mazo que lanza una serialización concurrente en mitad de cada reparto"""
+
+    def deal_cards(self, count):
+        reader = threading.Thread(target=self.game.get_game_state)
+        reader.start()
+        reader.join(0.05)
+        self.readers.append(reader)
+        return super().deal_cards(count)
+
+
+def test_concurrent_serialization_never_caches_stale_state():
+    game = PokerGame(2)
+    game.start_new_hand()
+    game.deck = deck = _InterleavedDeck()
+    deck.game, deck.readers = game, []
+    game.deal_flop()
+    for reader in deck.readers:
+        reader.join()
+    # El lector esperó al cerrojo: la versión nueva no quedó cacheada con el estado anterior
+    assert game.get_game_state() == game._build_state(game.version, False)
+    assert game.state_etag() == f"{game.game_id}-{game.version}-f"
+
+
+def test_custom_hand_rejects_used_cards_and_updates_deck():
+    game = PokerGame(3)
+    game.start_new_hand()
+    game.deal_flop()
+    with pytest.raises(ValueError):
+        game.set_player_hand(0, list(game.community_cards[:2]))
+    with pytest.raises(ValueError):
+        game.set_player_hand(0, [game.players[1].hand[0], game.deck.cards[0]])
+
+    old = game.players[0].hand
+    hand = game.deck.cards[:2]
+    game.set_player_hand(0, hand)
+    assert not set(hand) & set(game.deck.cards) and set(old) <= set(game.deck.cards)
+    game.deal_turn()
+    game.deal_river()
+    used = list(game.community_cards) + [card for player in game.players for card in player.hand]
+    assert len(used) == len(set(used)) == 11
+    assert game.deck.cards_left() == 52 - 11
+
+
+def test_only_full_state_responses_carry_the_etag():
+    client = app_module.app.test_client()
+    client.post("/new_game", json={"num_players": 2})
+    assert client.post("/deal_cards").headers.get("ETag") is None
+    response = client.get("/game_state")
+    etag = response.headers["ETag"]
+    assert response.get_json()["game_state"]["version"] == app_module.game.version
+    assert client.get("/game_state", headers={"If-None-Match": etag}).status_code == 304
+    delta = client.get(f"/game_state?since_version={app_module.game.version}")
+    assert delta.headers.get("ETag") is None and delta.get_json()["game_state"]["delta"] is True
@@ -0,0 +1,37 @@
+import numpy as np
+
+import app as app_module
+from tests.helpers import card_ints
+from utils.equity import all_seats_equity
+from utils.hand_grid import class_name, hand_class_equities
+
+
+def test_grid_layout_and_card_removal():
+    board = card_ints("Ah", "Ad", "Ac")
+    result = hand_class_equities(board, num_opponents=1, simulations=40)
+    assert class_name(0, 1) == "AKs" and class_name(1, 0) == "AKo" and class_name(12, 12) == "22"
+    assert result["grid"][0][0] is None and result["classes"]["AA"]["combos"] == 0
+    assert result["classes"]["AKs"]["combos"] == 1 and result["classes"]["KK"]["combos"] == 6
+    assert sum(c["combos"] for c in result["classes"].values()) == 49 * 48 // 2
+    # Boards isomorfos (palos renombrados) comparten la entrada de caché
+    assert hand_class_equities(card_ints("Ad", "Ac", "As"), 1, simulations=40)["grid"] is result["grid"]
+
+
+def test_class_equity_matches_per_combo_simulation():
+    board = card_ints("Kh", "9s", "7d")
+    grid = hand_class_equities(board, num_opponents=2)["classes"]
+    for cls, combos in (("87s", ("8h7h", "8s7s", "8c7c")), ("22", ("2h2d", "2c2s", "2h2s", "2d2c", "2h2c", "2d2s"))):
+        reference = np.mean([
+            all_seats_equity([card_ints(c[:2], c[2:]), None, None], board, simulations=10000, seed=1)["seats"][0]["equity"]
+            for c in combos
+        ])
+        assert abs(grid[cls]["equity"] - reference) < 0.03
+
+
+def test_endpoint_bounds_simulations():
+    client = app_module.app.test_client()
+    client.post("/new_game", json={"num_players": 2})
+    client.post("/deal_cards")
+    response = client.post("/hand_grid", json={"num_opponents": 1, "simulations": 10 ** 9})
+    assert response.status_code == 200
+    assert response.get_json()["analysis"]["runouts"] <= app_module.MAX_GRID_SIMULATIONS
@@ -0,0 +1,65 @@
+import itertools
+
+import numpy as np
+import pytest
+
+import app as app_module
+from core.player import Player
+from utils.icm import icm_equity, icm_equity_batch, icm_equity_monte_carlo, table_icm
+
+
+def _harville_by_permutations(stacks, payouts):
+    equity = [0.0] * len(stacks)
+    for order in itertools.permutations(range(len(stacks))):
+        prob, left = 1.0, sum(stacks)
+        for i in order:
+            prob *= stacks[i] / left
+            left -= stacks[i]
+        for place, i in enumerate(order[:len(payouts)]):
+            equity[i] += prob * payouts[place]
+    return equity
+
+
+def test_icm_matches_finishing_order_enumeration():
+    stacks, payouts = [1200, 800, 3000, 400, 2600, 1000], [40, 25, 15, 10]
+    assert np.allclose(icm_equity(stacks, payouts), _harville_by_permutations(stacks, payouts))
+    assert np.isclose(sum(icm_equity(stacks, payouts)), sum(payouts))
+
+
+def test_batch_and_monte_carlo_agree_with_exact():
+    rng = np.random.default_rng(3)
+    stacks = rng.integers(100, 5000, (50, 8))
+    payouts = [50, 30, 20]
+    batch = icm_equity_batch(stacks, payouts)
+    assert np.allclose(batch[7], icm_equity(stacks[7], payouts))
+    approx = icm_equity_monte_carlo(stacks[0], payouts, samples=200000, seed=1)
+    assert np.abs(approx - batch[0]).max() < 0.5
+
+
+def test_table_icm_uses_player_chips():
+    players = [Player("Ana", 100), Player("Luis", 0), Player("Carlos", 100)]
+    result = table_icm(players, [60, 40])
+    assert [row["equity"] for row in result] == [50.0, 0.0, 50.0]
+
+
+def test_batch_falls_back_to_monte_carlo_for_large_fields():
+    stacks = np.random.default_rng(5).integers(100, 5000, (3, 15))
+    payouts = [50, 30, 20]
+    batch = icm_equity_batch(stacks, payouts, samples=20000, seed=2)
+    assert batch.shape == (3, 15)
+    assert np.allclose(batch.sum(axis=1), sum(payouts))
+    assert np.abs(batch[1] - icm_equity_monte_carlo(stacks[1], payouts, 200000, seed=4)).max() < 1.0
+
+
+def test_negative_inputs_and_oversized_batches_are_rejected():
+    with pytest.raises(ValueError):
+        icm_equity([100, 100, -50], [60, 40])
+    with pytest.raises(ValueError):
+        icm_equity_batch([[100, 200]], [60, -40])
+
+    client = app_module.app.test_client()
+    assert client.post("/icm", json={"stacks": [[100, 100, -50]], "payouts": [60, 40]}).status_code == 400
+    too_many = [[100] * 15] * (app_module.MAX_ICM_MONTE_CARLO_SCENARIOS + 1)
+    assert client.post("/icm", json={"stacks": too_many, "payouts": [60, 40]}).status_code == 400
+    response = client.post("/icm", json={"stacks": [[100, 300], [200, 200]], "payouts": [60, 40]})
+    assert response.get_json()["equities"][1] == [50.0, 50.0]
@@ -0,0 +1,34 @@
+import numpy as np
+
+from utils import lazy_tables
+from utils.lazy_tables import LazyTable
+
+
+def test_lazy_table_builds_once_and_memory_maps(tmp_path, monkeypatch):
+    monkeypatch.setattr(lazy_tables, "PACKAGED_TABLE_DIR", str(tmp_path / "packaged"))
+    monkeypatch.setattr(lazy_tables, "CACHE_TABLE_DIR", str(tmp_path / "cache"))
+    calls = []
+
+    def builder():
+        calls.append(1)
+        return {"values": np.arange(10, dtype=np.int32)}
+
+    table = LazyTable("test_table", builder)
+    assert not table.loaded
+    assert int(table["values"][3]) == 3
+    assert isinstance(table["values"], np.memmap)
+    assert LazyTable("test_table", builder)["values"].sum() == 45
+    assert len(calls) == 1
+    lazy_tables.TABLES.pop("test_table")
+
+
+def test_packaged_tables_are_current():
+    # Las tablas se despliegan desde data/tables: deben existir y coincidir con sus builders
+    lazy_tables._register_tables()
+    for table in lazy_tables.TABLES.values():
+        arrays = LazyTable._load(f"{lazy_tables.PACKAGED_TABLE_DIR}/{table.dirname}")
+        assert arrays is not None, f"Falta {table.dirname}: python -m utils.lazy_tables build"
+        built = table.builder()
+        assert set(arrays) == set(built)
+        for key, array in built.items():
+            assert np.array_equal(arrays[key], array), f"{table.dirname}/{key} desactualizada"
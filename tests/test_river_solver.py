@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from core.fast_evaluator import HOLDEM_EVALUATOR
+from core.game import PokerGame
+from tests.helpers import card_ints
+from utils.assistant import PokerAssistant
+from utils.river_solver import _showdown_pair, all_combos, solve_river
+
+
+BOARD = card_ints("Kh", "9s", "7d", "4c", "2h")
+
+
+def test_showdown_values_match_pairwise_comparison():
+    hands = all_combos(BOARD)[::7]
+    forward, _ = _showdown_pair(tuple(sorted(BOARD)), tuple(hands), tuple(hands))
+    reach = np.random.default_rng(1).random(len(hands))
+    net, total = forward.evaluate(reach)
+
+    strength = HOLDEM_EVALUATOR.evaluate_batch([list(h) + list(BOARD) for h in hands])
+    for i, h in enumerate(hands):
+        compatible = [j for j, v in enumerate(hands) if not set(h) & set(v)]
+        expected = sum(reach[j] * np.sign(strength[i] - strength[j]) for j in compatible)
+        assert np.isclose(net[i], expected)
+        assert np.isclose(total[i], reach[compatible].sum())
+
+
+def test_polarized_spot_reaches_indifference_frequencies():
+    # Nuts (trío de reyes) o aire contra un atrapafaroles, apuesta del tamaño del bote
+    nuts = [card_ints("Kc", "Kd"), card_ints("Kc", "Ks"), card_ints("Kd", "Ks")]
+    air = [card_ints("6c", "5c"), card_ints("6d", "5d"), card_ints("6s", "5s")]
+    catchers = {card_ints("Ac", "9c"): 1.0, card_ints("Ad", "9d"): 1.0, card_ints("As", "9h"): 1.0}
+    hero_range = {combo: 1.0 for combo in nuts + air}
+
+    result = solve_river(BOARD, air[0], pot=100, stack=100, villain_range=catchers, hero_range=hero_range,
+                         bet_sizes=(1.0,), max_raises=0, iterations=2000)
+    bluff = result["strategy"][0]["actions"]["ALL-IN"]
+    # Faroles : valor = 1 : 2 para una apuesta del tamaño del bote
+    assert abs(bluff - 0.5) < 0.05
+    assert result["exploitability_pct_pot"] < 1.0
+
+    value = solve_river(BOARD, nuts[0], pot=100, stack=100, villain_range=catchers, hero_range=hero_range,
+                        bet_sizes=(1.0,), max_raises=0, iterations=2000)
+    assert value["cached"]
+    assert value["strategy"][0]["actions"]["ALL-IN"] > 0.95
+
+
+def test_default_ranges_solution_is_consistent():
+    result = solve_river(BOARD, card_ints("Ac", "Kd"), pot=100, stack=150, iterations=60)
+    for node in result["strategy"]:
+        assert np.isclose(sum(node["actions"].values()), 1.0)
+    assert result["strategy"][0]["history"] == "inicio"
+    assert 0 <= result["ev"] <= 100 + 150
+
+
+def test_assistant_requires_pot_without_recorded_bets():
+    game = PokerGame(2)
+    game.start_new_hand()
+    game.deal_flop()
+    game.deal_turn()
+    game.deal_river()
+    assistant = PokerAssistant(game, 0)
+    assert "pot" in assistant.solve_river_spot()["error"]
+    villain = [c.to_compact() for c in game.players[1].hand]
+    result = assistant.solve_river_spot(pot=100, opponent_range={"".join(villain): 1.0}, iterations=20)
+    assert result["pot"] == 100 and result["opponent_idx"] == 1
+    game.players[0].bet(40)
+    game.players[1].bet(40)
+    assert assistant.solve_river_spot(opponent_range={"".join(villain): 1.0}, iterations=20)["pot"] == 80
+
+
+def test_close_sizes_get_distinct_actions_and_inputs_are_validated():
+    hero = card_ints("Ac", "Kd")
+    result = solve_river(BOARD, hero, pot=1000, stack=3000, bet_sizes=(0.333, 0.334, 0.3333), iterations=10)
+    root = result["strategy"][0]["actions"]
+    assert [a for a in root if a.startswith("BET")] == ["BET 333 (33%)", "BET 334 (33%)"]
+    for node in result["strategy"]:
+        assert np.isclose(sum(node["actions"].values()), 1.0)
+
+    with pytest.raises(ValueError):
+        solve_river(BOARD, hero, pot=100, stack=100, bet_sizes=(0.25, 0.5, 0.75, 1.0, 1.5))
+    with pytest.raises(ValueError):
+        solve_river(BOARD, hero, pot=100, stack=100, bet_sizes=(-0.5,))
+    # Un rango rival bloqueado por la mano del jugador no tiene solución (antes daba EV NaN)
+    with pytest.raises(ValueError):
+        solve_river(BOARD, hero, pot=100, stack=100, villain_range={card_ints("Ac", "As"): 1.0})
@@ -0,0 +1,115 @@
+import json
+import threading
+
+import app as app_module
+from core.game import PokerGame
+from utils.table_updates import MAX_PENDING_ANALYSES, TableUpdates
+
+
+def test_mutations_coalesce_into_one_delta():
+    game = PokerGame(3)
+    game.start_new_hand()
+    hub = TableUpdates()
+    subscription = hub.subscribe("t", game, compact=True)
+
+    first = subscription.next_message(timeout=0)
+    assert first["type"] == "state" and first["game_state"]["delta"] is False
+    assert first["game_state"]["version"] == game.version
+    assert subscription.next_message(timeout=0) is None
+
+    game.deal_flop()
+    hub.publish_state("t", game)
+    game.deal_turn()
+    hub.publish_state("t", game)
+    message = subscription.next_message(timeout=0)
+    state = message["game_state"]
+    assert state["delta"] and state["base_version"] == first["game_state"]["version"]
+    assert state["version"] == game.version
+    assert state["changes"]["community_cards"] == game.get_game_state(True)["community_cards"]
+    assert subscription.next_message(timeout=0) is None
+
+    # Un juego nuevo en la mesa se envía completo; los análisis van después del estado
+    new_game = PokerGame(2)
+    new_game.start_new_hand()
+    hub.publish_state("t", new_game)
+    hub.publish_analysis("t", new_game, "hand_grid", {"grid": []}, num_opponents=1)
+    message = subscription.next_message(timeout=0)
+    assert message["game_id"] == new_game.game_id and message["game_state"]["delta"] is False
+    analysis = subscription.next_message(timeout=0)
+    assert analysis["kind"] == "hand_grid" and analysis["num_opponents"] == 1
+    assert analysis["version"] == new_game.version
+    assert hub.stats()["deltas_sent"] == 1 and hub.stats()["full_states_sent"] == 2
+
+
+def test_slow_subscriber_drops_oldest_analyses_and_resyncs():
+    game = PokerGame(2)
+    game.start_new_hand()
+    hub = TableUpdates()
+    state = game.get_game_state()
+    subscription = hub.subscribe("t", game, game_id=game.game_id, since_version=state["version"])
+    other = hub.subscribe("other")
+    assert subscription.next_message(timeout=0) is None
+
+    for i in range(MAX_PENDING_ANALYSES + 3):
+        hub.publish_analysis("t", game, "equity", {"i": i})
+    received = [subscription.next_message(timeout=0)["analysis"]["i"] for _ in range(MAX_PENDING_ANALYSES)]
+    assert received == list(range(3, MAX_PENDING_ANALYSES + 3))
+    assert hub.stats()["analyses_dropped"] == 3
+    assert other.next_message(timeout=0) is None
+
+    subscription.resync(game)
+    assert subscription.next_message(timeout=0)["game_state"]["delta"] is False
+
+    # Un suscriptor en espera se despierta al publicar
+    messages = []
+    waiter = threading.Thread(target=lambda: messages.append(subscription.next_message(timeout=5)))
+    waiter.start()
+    game.deal_flop()
+    hub.publish_state("t", game)
+    waiter.join()
+    assert messages[0]["game_state"]["delta"] is True
+
+    hub.unsubscribe(subscription)
+    hub.unsubscribe(other)
+    assert hub.stats()["connected"] == 0
+
+
+class _FakeSocket:
+    """Socket con los mensajes del cliente guionizados; se cierra al agotarlos"""
+
+    def __init__(self, incoming):
+        self.incoming = list(incoming)
+        self.sent = []
+
+    def send(self, data):
+        self.sent.append(json.loads(data))
+
+    def receive(self, timeout=None):
+        if not self.incoming:
+            raise app_module.ConnectionClosed()
+        return self.incoming.pop(0)
+
+
+def test_table_socket_loop(monkeypatch):
+    monkeypatch.setattr(app_module, "SOCKET_POLL_SECONDS", 0.01)
+    client = app_module.app.test_client()
+    client.post("/new_game", json={"num_players": 2})
+    game = app_module.game
+
+    # game_id mal formado: no se reanuda, se envía el estado completo
+    ws = _FakeSocket([None, "no es json", '{"type": "resync"}', None])
+    with app_module.app.test_request_context("/ws/table?game_id=abc&since_version=3&compact=1"):
+        app_module._serve_table_socket(ws)
+    assert [m["game_state"]["delta"] for m in ws.sent] == [False, False]
+    assert ws.sent[0]["game_id"] == game.game_id
+    assert ws.sent[0]["game_state"]["players"][0]["hand"] == [c.to_compact() for c in game.players[0].hand]
+
+    # Reanudación desde la versión que ya tiene el cliente: solo llega el delta
+    version = game.get_game_state()["version"]
+    game.deal_flop()
+    ws = _FakeSocket([None])
+    with app_module.app.test_request_context(f"/ws/table?game_id={game.game_id}&since_version={version}"):
+        app_module._serve_table_socket(ws)
+    assert ws.sent[0]["game_state"]["delta"] is True
+    assert set(ws.sent[0]["game_state"]["changes"]) == {"stage", "community_cards"}
+    assert app_module.table_updates.stats()["connected"] == 0
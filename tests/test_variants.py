@@ -0,0 +1,38 @@
+import numpy as np
+
+from core.card import HandRank
+from core.game import PokerGame
+from core.variants import OMAHA, SHORT_DECK, combination_indexes
+from tests.helpers import card_ints
+from utils.assistant import PokerAssistant
+
+
+def test_omaha_uses_exactly_two_hole_cards():
+    assert combination_indexes(4, 5, 2).shape == (60, 5)
+    # Cuatro corazones en la mano y uno en el board: no hay color en Omaha
+    strength = OMAHA.evaluate_batch([card_ints("Ah", "Kh", "Qh", "Jh")], [card_ints("2h", "7c", "8d", "9s", "3c")])[0]
+    assert OMAHA.evaluator.hand_rank(int(strength)) == HandRank.HIGH_CARD
+
+
+def test_short_deck_flush_beats_full_house():
+    deck = np.array(SHORT_DECK.deck_ints())
+    assert len(deck) == 36
+    flush = SHORT_DECK.evaluate_batch([card_ints("Ah", "7h")], [card_ints("9h", "Th", "6h", "Kd", "Kc")])[0]
+    full = SHORT_DECK.evaluate_batch([card_ints("Ks", "Kh")], [card_ints("9h", "Th", "6h", "Kd", "9c")])[0]
+    assert flush > full
+    wheel = SHORT_DECK.evaluate_batch([card_ints("As", "6d")], [card_ints("7h", "8c", "9d", "Kd", "Qc")])[0]
+    assert SHORT_DECK.evaluator.hand_rank(int(wheel)) == HandRank.STRAIGHT
+
+
+def test_assistant_supports_every_variant():
+    for variant in (OMAHA, SHORT_DECK):
+        game = PokerGame(3, variant=variant)
+        game.start_new_hand()
+        game.deal_flop()
+        assert all(len(player.hand) == variant.hole_cards for player in game.players)
+        assistant = PokerAssistant(game)
+        equity = assistant.calculate_all_seats_equity(known_hands=True)
+        assert abs(sum(seat["equity"] for seat in equity["seats"]) - 1) < 1e-9
+        assert assistant.calculate_outs()["total_outs"] <= len(assistant.get_remaining_deck())
+        assert 0 <= assistant.calculate_hand_strength()["strength_percentile"] <= 1
+        assert 0 <= assistant.calculate_hand_potential()["ehs"] <= 1
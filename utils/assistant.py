@@ -1,9 +1,31 @@
-from typing import List, Dict
+import logging
+from typing import List, Dict, Optional
 from collections import defaultdict
-import random
+import numpy as np
 from core.game import PokerGame
-from core.card import Card, Rank, Suit, HandRank
+from core.card import Card
 from core.hand_evaluator import HandEvaluator
+from core.variants import HOLDEM
+from core.fast_evaluator import cards_to_ints
+from utils.equity import all_seats_equity
+from utils.equity_model import DEFAULT_TOLERANCE, approximate_equity
+from utils.hand_strength import hand_strength
+from utils.hand_grid import hand_class_equities
+from utils.hand_potential import hand_potential
+from utils.river_solver import DEFAULT_BET_SIZES, solve_river
+
+logger = logging.getLogger(__name__)
+
+# PPot a partir del cual la mano se considera un proyecto (draw) relevante
+DRAW_PPOT = 0.2
+# NPot a partir del cual una mano hecha se considera vulnerable
+VULNERABLE_NPOT = 0.2
+# Evaluaciones del potencial en la sugerencia de acción: en el flop muestrea (~1/4 de la
+# enumeración completa, error ~1 punto en PPot/NPot) para responder de forma interactiva
+SUGGESTION_MAX_EVALUATIONS = 300_000
+# Sugerencias marginales que, si se conocen las pot odds, se resuelven en CALL o FOLD
+POT_ODDS_ACTIONS = ("CALL si las odds son favorables", "CHECK/CALL si las odds son favorables",
+                    "CHECK/FOLD (Pasar/Retirarse)", "FOLD (Retirarse)")
 
 class PokerAssistant:
     """Asistente inteligente para póker que ayuda con análisis y predicciones"""
@@ -21,9 +43,25 @@ class PokerAssistant:
             self.known_cards.update(self.game.players[self.player_idx].hand)
         self.known_cards.update(self.game.community_cards)
     
+    def situation_key(self, known_hands: bool = False) -> tuple:
+        """
+        Clave canónica de la situación analizada (variante, mano, board y, en modo de manos
+        conocidas, las manos de toda la mesa), para agrupar peticiones idénticas.
+        """
+        players = self.game.players
+        key = (
+            self.game.variant.name,
+            tuple(sorted(cards_to_ints(players[self.player_idx].hand))),
+            tuple(sorted(cards_to_ints(self.game.community_cards))),
+        )
+        if known_hands:
+            key += (tuple(None if player.folded else tuple(sorted(cards_to_ints(player.hand)))
+                          for player in players),)
+        return key
+    
     def get_remaining_deck(self) -> List[Card]:
         """Obtiene las cartas que quedan en el mazo (excluyendo las conocidas)"""
-        all_cards = [Card(rank, suit) for rank in Rank for suit in Suit]
+        all_cards = self.game.variant.deck_cards()
         return [card for card in all_cards if card not in self.known_cards]
     
     def calculate_hand_strength(self) -> Dict[str, any]:
@@ -32,14 +70,23 @@ class PokerAssistant:
             return {"error": "Necesita al menos el flop para calcular fuerza"}
         
         self.update_known_cards()
+        variant = self.game.variant
         all_cards = self.game.players[self.player_idx].hand + self.game.community_cards
-        current_rank, values = HandEvaluator.evaluate_hand(all_cards)
+        strength = hand_strength(cards_to_ints(self.game.players[self.player_idx].hand),
+                                 cards_to_ints(self.game.community_cards), variant)
+        current_rank = variant.evaluator.hand_rank(strength["hand_class"])
+        # Los valores de desempate del evaluador clásico solo son válidos en Hold'em
+        values = HandEvaluator.evaluate_hand(all_cards)[1] if variant is HOLDEM else []
         print('[DEBUG calculate_hand_strength] current_rank:', current_rank, 'values:', values)
         
         return {
             "current_hand": current_rank.name,
             "hand_values": values,
-            "strength_percentile": self._calculate_percentile(current_rank, values),
+            "strength_percentile": strength["strength_percentile"],
+            "beats": strength["beats"],
+            "ties": strength["ties"],
+            "loses": strength["loses"],
+            "class_percentile": strength["class_percentile"],
             "cards_in_hand": all_cards
         }
     
@@ -54,101 +101,87 @@ class PokerAssistant:
                 "probability": 0.0
             }
         
+        if len(self.game.community_cards) < 3:
+            return {
+                "message": "Necesita al menos el flop para calcular outs",
+                "total_outs": 0,
+                "out_cards": [],
+                "improvements": {},
+                "probability": 0.0
+            }
+        
         self.update_known_cards()
-        current_hand = self.game.players[self.player_idx].hand + self.game.community_cards
-        current_rank, current_values = HandEvaluator.evaluate_hand(current_hand)
-        print('[DEBUG calculate_outs] current_rank:', current_rank, 'current_values:', current_values)
+        variant = self.game.variant
+        hole = np.array(cards_to_ints(self.game.players[self.player_idx].hand))
+        board = np.array(cards_to_ints(self.game.community_cards))
+        current = variant.evaluate_batch([hole], [board])[0]
+        print('[DEBUG calculate_outs] current:', variant.evaluator.hand_rank(current))
         
         remaining_cards = self.get_remaining_deck()
         outs = []
         improvement_chances = defaultdict(list)
         
-        # Probar cada carta restante
-        for card in remaining_cards:
-            test_hand = current_hand + [card]
-            test_rank, test_values = HandEvaluator.evaluate_hand(test_hand)
-            print('[DEBUG calculate_outs] test_card:', card, 'test_rank:', test_rank, 'test_values:', test_values)
-            
+        # Probar todas las cartas restantes en un solo lote
+        n = len(remaining_cards)
+        test_boards = np.hstack([np.broadcast_to(board, (n, len(board))),
+                                 np.array(cards_to_ints(remaining_cards)).reshape(-1, 1)])
+        tests = variant.evaluate_batch(np.broadcast_to(hole, (n, len(hole))), test_boards)
+        for card, strength in zip(remaining_cards, tests):
             # Si mejora la mano
-            if (test_rank.value > current_rank.value or 
-                (test_rank.value == current_rank.value and self._compare_values(test_values, current_values) > 0)):
-                
-                print('[DEBUG calculate_outs] OUT found:', card)
+            if strength > current:
                 outs.append(card)
-                improvement_chances[test_rank.name].append(card)
+                improvement_chances[variant.evaluator.hand_rank(strength).name].append(card)
         
         print('[DEBUG calculate_outs] outs:', outs)
         return {
             "total_outs": len(outs),
             "out_cards": outs,
             "improvements": dict(improvement_chances),
-            "probability": self._calculate_probability(len(outs), 5 - len(self.game.community_cards))
+            "probability": self._calculate_probability(len(outs), 5 - len(self.game.community_cards), len(remaining_cards))
         }
     
-    def predict_winning_probability(self, num_opponents: int = 1) -> Dict[str, float]:
-        """Predice la probabilidad de ganar contra N oponentes"""
+    def predict_winning_probability(self, num_opponents: int = 1, known_hands: bool = False,
+                                    tolerance: Optional[float] = DEFAULT_TOLERANCE) -> Dict[str, float]:
+        """
+        Predice la probabilidad de ganar contra N oponentes.
+        Con `known_hands=True` se usan las manos reales de los rivales de la mesa en lugar de manos al azar.
+        Contra manos al azar en Hold'em se responde con el modelo aprendido (utils.equity_model) si su
+        cota de error no supera `tolerance`; si no (o con `tolerance=None`) se simula.
+        El modelo solo estima la equidad (los empates cuentan como fracción del bote): en ese caso
+        `tie_probability` es 0.0 y `tie_estimated` es False.
+        """
         if len(self.game.community_cards) < 3:
             return {"error": "Necesita al menos el flop para predicciones precisas"}
         
         self.update_known_cards()
-        remaining_cards = self.get_remaining_deck()
-        player_hand = self.game.players[self.player_idx].hand + self.game.community_cards
-        
-        # Simulación Monte Carlo
-        wins = 0
-        simulations = 1000
-        cards_to_deal = 5 - len(self.game.community_cards)
-        
-        for _ in range(simulations):
-            # Crear una baraja temporal
-            temp_deck = remaining_cards.copy()
-            random.shuffle(temp_deck)
-            
-            # Completar las cartas comunitarias
-            if cards_to_deal > 0:
-                additional_community = temp_deck[:cards_to_deal]
-                complete_community = self.game.community_cards + additional_community
-                temp_deck = temp_deck[cards_to_deal:]
-            else:
-                complete_community = self.game.community_cards
-            
-            # Mano completa del jugador
-            player_complete = self.game.players[self.player_idx].hand + complete_community
-            player_rank, player_values = HandEvaluator.evaluate_hand(player_complete)
-            print('[DEBUG predict_winning_probability] player_rank:', player_rank, 'player_values:', player_values)
-            
-            # Simular manos de oponentes
-            player_wins = True
-            cards_used = cards_to_deal
-            
-            for opponent in range(num_opponents):
-                if len(temp_deck) < 2:
-                    break
-                
-                opponent_hole = temp_deck[cards_used:cards_used + 2]
-                opponent_complete = opponent_hole + complete_community
-                opponent_rank, opponent_values = HandEvaluator.evaluate_hand(opponent_complete)
-                print('[DEBUG predict_winning_probability] opponent_rank:', opponent_rank, 'opponent_values:', opponent_values)
-                
-                # Comparar manos
-                if (opponent_rank.value > player_rank.value or 
-                    (opponent_rank.value == player_rank.value and 
-                    self._compare_values(opponent_values, player_values) > 0)):
-                    player_wins = False
-                    break
-                
-                cards_used += 2
-            
-            if player_wins:
-                wins += 1
-        
-        print('[DEBUG predict_winning_probability] wins:', wins, 'simulations:', simulations)
-        win_probability = wins / simulations
+        approximation = None
+        if not known_hands and tolerance is not None and self.game.variant is HOLDEM:
+            approximation = approximate_equity(cards_to_ints(self.game.players[self.player_idx].hand),
+                                               cards_to_ints(self.game.community_cards), num_opponents, tolerance)
+        if approximation is not None:
+            equity = {"method": "model", "runouts": 0}
+            hero = {"equity": approximation["equity"], "tie": 0.0, "error_bound": approximation["error_bound"]}
+        elif known_hands:
+            equity = self.calculate_all_seats_equity(known_hands=True)
+            if "error" in equity:
+                return equity
+            hero = equity["seats"][self.player_idx]
+            num_opponents = sum(1 for seat in equity["seats"] if seat["player_idx"] != self.player_idx and seat["active"])
+        else:
+            hole_cards = [cards_to_ints(self.game.players[self.player_idx].hand)] + [None] * num_opponents
+            equity = all_seats_equity(hole_cards, cards_to_ints(self.game.community_cards), variant=self.game.variant)
+            hero = equity["seats"][0]
+        logger.debug("predict_winning_probability hero=%s runouts=%s", hero, equity["runouts"])
+        win_probability = hero["equity"]
         
         return {
             "win_probability": win_probability,
             "win_percentage": win_probability * 100,
-            "simulations_run": simulations,
+            "tie_probability": hero["tie"],
+            "tie_estimated": equity["method"] != "model",
+            "simulations_run": equity["runouts"],
+            "method": equity["method"],
+            "error_bound": hero.get("error_bound"),
             "opponents": num_opponents,
             "opponent_analysis": {
                 "board_texture": "N/A (análisis de textura pendiente)",
@@ -159,9 +192,115 @@ class PokerAssistant:
                 "reasoning": "N/A (análisis de farol pendiente)" 
             }
         }
+
+    def calculate_all_seats_equity(self, known_hands: bool = True, simulations: int = 1000) -> Dict[str, any]:
+        """
+        Equidad de todos los asientos en una sola pasada de simulación/enumeración.
+        - known_hands=True: vista de la mesa, se usan las manos reales de todos los jugadores.
+        - known_hands=False: vista del jugador `player_idx`, las manos rivales son desconocidas.
+        Los jugadores retirados no participan y tienen equidad 0.
+        """
+        players = self.game.players
+        active = [i for i, player in enumerate(players) if not player.folded]
+        hole_cards = []
+        for i in active:
+            if known_hands or i == self.player_idx:
+                if len(players[i].hand) != self.game.variant.hole_cards:
+                    return {"error": f"{players[i].name} no tiene cartas"}
+                hole_cards.append(cards_to_ints(players[i].hand))
+            else:
+                hole_cards.append(None)
+        dead = [code for i, player in enumerate(players) if known_hands and i not in active
+                for code in cards_to_ints(player.hand)]
+        result = all_seats_equity(hole_cards, cards_to_ints(self.game.community_cards),
+                                  simulations=simulations, variant=self.game.variant, dead=dead)
+        by_seat = dict(zip(active, result["seats"]))
+        seats = []
+        for i, player in enumerate(players):
+            seat = by_seat.get(i, {"known": known_hands, "win": 0.0, "tie": 0.0, "lose": 1.0, "equity": 0.0})
+            seats.append(dict(seat, player_idx=i, name=player.name, active=i in by_seat))
+        return {
+            "mode": "known" if known_hands else "hidden",
+            "method": result["method"],
+            "runouts": result["runouts"],
+            "seats": seats,
+        }
     
+    def calculate_hand_potential(self, num_opponents: int = 1, max_evaluations: Optional[int] = None) -> Dict[str, any]:
+        """
+        Fuerza efectiva de la mano: HS actual, potencial positivo (PPot) y negativo (NPot), EHS y EHS².
+        Distingue una mano hecha fuerte (HS alto) de un proyecto fuerte (PPot alto).
+        Con `max_evaluations` se acota el coste; si no alcanza para enumerar, se muestrea.
+        """
+        if len(self.game.community_cards) < 3:
+            return {"error": "Necesita al menos el flop para calcular el potencial"}
+        kwargs = {} if max_evaluations is None else {"max_evaluations": max_evaluations}
+        return hand_potential(cards_to_ints(self.game.players[self.player_idx].hand),
+                              cards_to_ints(self.game.community_cards), num_opponents,
+                              variant=self.game.variant, **kwargs)
+
+    def calculate_hand_class_grid(self, num_opponents: int = 1, simulations: Optional[int] = None) -> Dict[str, any]:
+        """
+        Equidad de las 169 clases de manos iniciales contra `num_opponents` rivales al azar en el
+        board actual (cuadrícula 13x13 con pares en la diagonal y suited por encima).
+        """
+        if self.game.variant is not HOLDEM:
+            return {"error": "La cuadrícula de clases de manos solo admite Texas Hold'em"}
+        result = dict(hand_class_equities(cards_to_ints(self.game.community_cards), num_opponents, simulations))
+        result["board"] = [card.to_compact() for card in self.game.community_cards]
+        return result
+
+    def solve_river_spot(self, opponent_idx: Optional[int] = None, pot: Optional[int] = None,
+                         bet_sizes=DEFAULT_BET_SIZES, opponent_range: Optional[Dict[str, float]] = None,
+                         acts_first: bool = True, iterations: int = 300) -> Dict[str, any]:
+        """
+        Estrategia de equilibrio en el river heads-up para la mano del jugador.
+        La mesa no lleva ciegas ni rondas de apuestas, así que `pot` es obligatorio salvo que se
+        hayan registrado apuestas con `Player.bet` (entonces se usa su suma). El stack efectivo es
+        el menor de las fichas de ambos jugadores. `opponent_range` asocia combinaciones compactas ('AhKd')
+        a su peso; sin él, el rival puede tener cualquier combinación compatible con el board.
+        """
+        if self.game.variant is not HOLDEM:
+            return {"error": "El solver de river solo admite Texas Hold'em"}
+        if len(self.game.community_cards) != 5:
+            return {"error": "El solver requiere el river (5 cartas comunitarias)"}
+        hero = self.game.players[self.player_idx]
+        if opponent_idx is None:
+            rivals = [i for i, player in enumerate(self.game.players)
+                      if i != self.player_idx and player.is_active()]
+            if len(rivals) != 1:
+                return {"error": "El solver requiere un bote heads-up (un único rival activo)"}
+            opponent_idx = rivals[0]
+        if not 0 <= opponent_idx < len(self.game.players) or opponent_idx == self.player_idx:
+            return {"error": "Índice de rival inválido"}
+        villain = self.game.players[opponent_idx]
+        if pot is None:
+            pot = sum(player.current_bet for player in self.game.players)
+            if pot <= 0:
+                return {"error": "Indica el bote (pot): la mesa no registra apuestas"}
+        if pot <= 0:
+            return {"error": "El bote debe ser positivo"}
+        villain_range = None
+        if opponent_range is not None:
+            villain_range = {}
+            for code, weight in opponent_range.items():
+                if len(code) != 4:
+                    raise ValueError(f"Combinación inválida: {code!r}")
+                combo = tuple(cards_to_ints([Card.from_compact(code[:2]), Card.from_compact(code[2:])]))
+                villain_range[combo] = float(weight)
+        result = solve_river(cards_to_ints(self.game.community_cards), tuple(cards_to_ints(hero.hand)),
+                             pot, min(hero.chips, villain.chips), villain_range=villain_range,
+                             bet_sizes=tuple(bet_sizes), hero_first=acts_first, iterations=iterations)
+        result["opponent_idx"] = opponent_idx
+        return result
+
     def suggest_best_action(self, pot_odds: float = 0.0) -> Dict[str, any]:
-        """Sugiere la mejor acción basada en el análisis de la mano"""
+        """
+        Sugiere la mejor acción basada en el análisis de la mano. `pot_odds` es la fracción del
+        bote final que cuesta igualar (0 si no hay apuesta que igualar o no se conoce).
+        """
+        if not 0 <= pot_odds < 1:
+            return {"error": "pot_odds debe estar en [0, 1)"}
         try:
             hand_strength_data = self.calculate_hand_strength()
             print(f"[DEBUG suggest_best_action] hand_strength_data: {hand_strength_data}")
@@ -169,8 +308,10 @@ class PokerAssistant:
             print(f"[DEBUG suggest_best_action] outs_info: {outs_info}")
             win_prob = self.predict_winning_probability()
             print(f"[DEBUG suggest_best_action] win_prob: {win_prob}")
+            potential = self.calculate_hand_potential(max_evaluations=SUGGESTION_MAX_EVALUATIONS)
+            logger.debug("suggest_best_action potential=%s", potential)
         
-            if "error" in hand_strength_data or "error" in win_prob:
+            if "error" in hand_strength_data or "error" in win_prob or "error" in potential:
                 print('[DEBUG suggest_best_action] error:', hand_strength_data.get("error"), win_prob.get("error"))
                 suggestion = {
                     "action": "NO_ACTION",
@@ -190,6 +331,8 @@ class PokerAssistant:
                 return suggestion
         
             win_percentage = win_prob["win_percentage"]
+            is_draw = potential["ppot"] >= DRAW_PPOT
+            vulnerable = potential["npot"] >= VULNERABLE_NPOT
             suggestion = {
                 "action": "",
                 "reason": "",
@@ -200,7 +343,13 @@ class PokerAssistant:
                     "improvement_probability": outs_info.get("probability", 0.0) * 100,
                     "current_hand": hand_strength_data.get("current_hand", "N/A"),
                     "strength_percentile": hand_strength_data.get("strength_percentile", 0.0) * 100,
-                    "win_percentage": win_prob.get("win_percentage", 0.0)
+                    "win_percentage": win_prob.get("win_percentage", 0.0),
+                    "ehs": potential["ehs"] * 100,
+                    "ehs2": potential["ehs2"] * 100,
+                    "positive_potential": potential["ppot"] * 100,
+                    "negative_potential": potential["npot"] * 100,
+                    "hand_type": "draw" if is_draw and potential["hand_strength"] < 0.5 else "made",
+                    "pot_odds": pot_odds * 100
                 },
                 "hand_values": hand_strength_data.get("values", [])
             }
@@ -209,12 +358,15 @@ class PokerAssistant:
             if win_percentage > 70:
                 suggestion["action"] = "BET/RAISE (Apostar/Subir)"
                 suggestion["reason"] = f"Mano muy fuerte ({win_percentage:.1f}% probabilidad de ganar)"
+                if vulnerable:
+                    suggestion["reason"] += f"; vulnerable (NPot {potential['npot'] * 100:.1f}%), conviene proteger"
                 suggestion["confidence"] = 9
         
             elif win_percentage > 50:
-                if outs_info.get("total_outs", 0) > 8:
+                if is_draw:
                     suggestion["action"] = "CALL/BET (Igualar/Apostar)"
-                    suggestion["reason"] = f"Mano decente con {outs_info['total_outs']} outs"
+                    suggestion["reason"] = (f"Mano decente con {outs_info.get('total_outs', 0)} outs "
+                                            f"(PPot {potential['ppot'] * 100:.1f}%)")
                     suggestion["confidence"] = 7
                 else:
                     suggestion["action"] = "CALL (Igualar)"
@@ -222,19 +374,37 @@ class PokerAssistant:
                     suggestion["confidence"] = 5
         
             elif win_percentage > 30:
-                if outs_info.get("total_outs", 0) > 6:
+                if is_draw:
                     suggestion["action"] = "CALL si las odds son favorables"
-                    suggestion["reason"] = f"{outs_info['total_outs']} outs disponibles"
+                    suggestion["reason"] = (f"Proyecto con {outs_info.get('total_outs', 0)} outs "
+                                            f"(EHS {potential['ehs'] * 100:.1f}%)")
                     suggestion["confidence"] = 4
                 else:
                     suggestion["action"] = "CHECK/FOLD (Pasar/Retirarse)"
                     suggestion["reason"] = f"Mano débil ({win_percentage:.1f}% probabilidad)"
                     suggestion["confidence"] = 3
         
+            elif is_draw and potential["ehs"] > 0.4:
+                suggestion["action"] = "CHECK/CALL si las odds son favorables"
+                suggestion["reason"] = f"Mano débil pero con proyecto fuerte (EHS {potential['ehs'] * 100:.1f}%)"
+                suggestion["confidence"] = 4
+        
             else:
                 suggestion["action"] = "FOLD (Retirarse)"
                 suggestion["reason"] = f"Mano muy débil ({win_percentage:.1f}% probabilidad)"
                 suggestion["confidence"] = 8
+
+            # Igualar es rentable si la equity (el EHS de un proyecto, que cuenta su potencial)
+            # cubre las pot odds
+            if pot_odds > 0 and suggestion["action"] in POT_ODDS_ACTIONS:
+                equity = max(potential["ehs"], win_percentage / 100) if is_draw else win_percentage / 100
+                if equity >= pot_odds:
+                    suggestion["action"] = "CALL (Igualar)"
+                    suggestion["reason"] += f"; las pot odds ({pot_odds * 100:.1f}%) justifican igualar"
+                    suggestion["confidence"] = 5
+                else:
+                    suggestion["action"] = "FOLD (Retirarse)"
+                    suggestion["reason"] += f"; las pot odds ({pot_odds * 100:.1f}%) no justifican igualar"
         
             print(f"[DEBUG suggest_best_action] Final suggestion: {suggestion}")
             return suggestion
@@ -245,11 +415,6 @@ class PokerAssistant:
             return {"error": "Error interno al sugerir acción"}
 
     
-    def _calculate_percentile(self, rank: HandRank, values: List[int]) -> float:
-        """Calcula el percentil de fuerza de la mano"""
-        rank_value = rank.value * 1000000 + sum(v * (100 ** i) for i, v in enumerate(reversed(values)))
-        return rank_value / (HandRank.ROYAL_FLUSH.value * 1000000 + 14 * 10000 + 14 * 100 + 14)
-    
     def _compare_values(self, values1: List[int], values2: List[int]) -> int:
         """Compara dos listas de valores para desempate"""
         for v1, v2 in zip(values1, values2):
@@ -259,10 +424,10 @@ class PokerAssistant:
                 return -1
         return 0
     
-    def _calculate_probability(self, outs: int, cards_to_come: int) -> float:
-        """Calcula la probabilidad de mejorar la mano"""
+    def _calculate_probability(self, outs: int, cards_to_come: int, unseen: int = 47) -> float:
+        """Calcula la probabilidad de mejorar la mano con `unseen` cartas sin ver"""
         if cards_to_come == 1:
-            return outs / 47
+            return outs / unseen
         elif cards_to_come == 2:
-            return 1 - ((47 - outs) / 47) * ((46 - outs) / 46)
+            return 1 - ((unseen - outs) / unseen) * ((unseen - 1 - outs) / (unseen - 1))
         return 0
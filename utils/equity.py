@@ -0,0 +1,102 @@
+"""
+Equidad simultánea para todos los asientos de una mesa.
+
+Cada runout (cartas comunitarias restantes + manos ocultas) se muestrea o enumera una sola vez
+y se evalúa para todos los asientos en el mismo lote, de modo que N asientos cuestan
+prácticamente lo mismo que uno.
+"""
+from itertools import combinations
+from math import comb
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from core.variants import HOLDEM, GameVariant
+
+# Por encima de este número de runouts se usa Monte Carlo en lugar de enumeración exacta
+MAX_ENUMERATION = 20000
+
+
+def all_seats_equity(
+    hole_cards: Sequence[Optional[Sequence[int]]],
+    board: Sequence[int],
+    simulations: int = 1000,
+    max_enumeration: int = MAX_ENUMERATION,
+    variant: GameVariant = HOLDEM,
+    dead: Sequence[int] = (),
+    seed: Optional[int] = None,
+) -> dict:
+    """
+    Calcula ganar/empatar/perder y la equidad de cada asiento.
+
+    `hole_cards[i]` son las cartas codificadas del asiento i, o None si son desconocidas (se
+    reparten al azar en cada muestra). Si todas las manos son conocidas y el número de runouts
+    es pequeño se enumeran todos; si no, se muestrean `simulations` runouts compartidos.
+    `dead` son cartas conocidas fuera de juego (p. ej. las de jugadores retirados).
+    """
+    board = list(board)
+    known = [list(h) if h is not None else None for h in hole_cards]
+    dead = set(board) | set(dead)
+    for hand in known:
+        if hand is not None:
+            dead.update(hand)
+    remaining = np.array([c for c in variant.deck_ints() if c not in dead], dtype=np.int64)
+    hole_size = variant.hole_cards
+    board_needed = 5 - len(board)
+    unknown = [i for i, hand in enumerate(known) if hand is None]
+    needed = board_needed + hole_size * len(unknown)
+    if needed > len(remaining):
+        raise ValueError("No quedan cartas suficientes para completar la simulación")
+
+    total_runouts = comb(len(remaining), board_needed) if not unknown else None
+    if total_runouts is not None and total_runouts <= max_enumeration:
+        method = "enumeration"
+        if board_needed:
+            drawn = remaining[np.array(list(combinations(range(len(remaining)), board_needed)), dtype=np.int64)]
+        else:
+            drawn = np.empty((1, 0), dtype=np.int64)
+    else:
+        method = "monte_carlo"
+        rng = np.random.default_rng(seed)
+        drawn = remaining[rng.random((simulations, len(remaining))).argsort(axis=1)[:, :needed]]
+
+    runouts = len(drawn)
+    full_board = np.hstack([np.broadcast_to(np.array(board, dtype=np.int64), (runouts, len(board))),
+                            drawn[:, :board_needed]])
+    seats = []
+    offset = board_needed
+    for hand in known:
+        if hand is None:
+            seats.append(drawn[:, offset:offset + hole_size])
+            offset += hole_size
+        else:
+            seats.append(np.broadcast_to(np.array(hand, dtype=np.int64), (runouts, hole_size)))
+    # (runouts, asientos, cartas) -> una sola llamada al evaluador
+    holes = np.stack(seats, axis=1).reshape(-1, hole_size)
+    boards = np.repeat(full_board, len(seats), axis=0)
+    strengths = variant.evaluate_batch(holes, boards).reshape(runouts, len(seats))
+    return _summarize(strengths, method, known)
+
+
+def _summarize(strengths: np.ndarray, method: str, known: List[Optional[list]]) -> dict:
+    runouts = strengths.shape[0]
+    best = strengths.max(axis=1, keepdims=True)
+    is_best = strengths == best
+    winners = is_best.sum(axis=1, keepdims=True)
+    wins = (is_best & (winners == 1)).sum(axis=0)
+    ties = (is_best & (winners > 1)).sum(axis=0)
+    equity = (is_best / winners).sum(axis=0)
+    return {
+        "method": method,
+        "runouts": runouts,
+        "seats": [
+            {
+                "known": known[i] is not None,
+                "win": float(wins[i]) / runouts,
+                "tie": float(ties[i]) / runouts,
+                "lose": float(runouts - wins[i] - ties[i]) / runouts,
+                "equity": float(equity[i]) / runouts,
+            }
+            for i in range(strengths.shape[1])
+        ],
+    }
@@ -0,0 +1,364 @@
+"""
+Aproximador aprendido de la equidad contra N rivales con manos al azar (Texas Hold'em).
+
+Un pipeline offline genera muestras `(mano, board, rivales) -> equidad` con la simulación de
+`utils.equity`, extrae características baratas (fuerza exacta de la mano, categoría, textura del
+board, proyectos) y ajusta dos modelos de gradient boosting de scikit-learn: uno para la equidad
+y otro para su error absoluto esperado. Un conjunto de calibración separado fija el factor que
+convierte el error esperado en una cota con la cobertura `COVERAGE`.
+
+Los árboles se compilan a arrays numpy y se guardan en un .npz junto a las estadísticas de
+calibración, así que servir el modelo no importa scikit-learn y cuesta microsegundos. El
+asistente solo responde con el modelo si la cota de error está dentro de la tolerancia; si no,
+simula.
+
+Entrenamiento (el .npz resultante se versiona en data/models, como las tablas precalculadas):
+    python -m utils.equity_model train [--samples 20000] [--simulations 2000] [--jobs 4]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.fast_evaluator import HOLDEM_EVALUATOR
+from utils.equity import all_seats_equity
+from utils.hand_strength import hand_strength
+
+MODEL_PATH = os.environ.get(
+    "POKER_EQUITY_MODEL",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "models", "equity_model.npz"),
+)
+# Incrementar al cambiar las características para no cargar modelos incompatibles
+FORMAT_VERSION = 1
+
+# Cota de error absoluta (en equidad, 0..1) por debajo de la cual se responde con el modelo
+DEFAULT_TOLERANCE = 0.03
+# Fracción de casos de calibración cuyo error real queda por debajo de la cota
+COVERAGE = 0.9
+MAX_OPPONENTS = 9
+
+FEATURE_NAMES = [
+    "opponents", "board_size", "high_rank", "low_rank", "pocket_pair", "suited",
+    "strength_percentile", "beats", "ties", "strength_vs_field", "class_percentile", "category",
+    "board_rank_repeats", "board_suit_count", "flush_count", "straight_count", "board_straight_count",
+    "overcards", "board_pairs_hit", "board_top_rank", "high_minus_top",
+]
+
+
+def _straight_count(ranks: Sequence[int]) -> int:
+    """Máximo de rangos distintos dentro de una ventana de escalera (el As también cuenta como 1)"""
+    mask = 0
+    for rank in ranks:
+        mask |= 2 << rank
+    mask |= mask >> 13 & 1
+    return max(bin(mask >> low & 0x1F).count("1") for low in range(10))
+
+
+def equity_features(hero: Sequence[int], board: Sequence[int], num_opponents: int) -> List[float]:
+    """Vector de características (en el orden de FEATURE_NAMES) de una mano con 3 a 5 cartas de board"""
+    hero, board = list(hero), list(board)
+    high, low = sorted((c >> 2 for c in hero), reverse=True)
+    board_ranks = [c >> 2 for c in board]
+    board_suits = [c & 3 for c in board]
+    cards = hero + board
+    suits = [c & 3 for c in cards]
+    hs = hand_strength(hero, board)
+    top = max(board_ranks)
+    return [
+        num_opponents,
+        len(board),
+        high,
+        low,
+        high == low,
+        (hero[0] & 3) == (hero[1] & 3),
+        hs["strength_percentile"],
+        hs["beats"],
+        hs["ties"],
+        hs["strength_percentile"] ** num_opponents,
+        hs["class_percentile"],
+        HOLDEM_EVALUATOR.hand_rank(hs["hand_class"]).value,
+        max(board_ranks.count(r) for r in board_ranks),
+        max(board_suits.count(s) for s in board_suits),
+        max(suits.count(c & 3) for c in hero),
+        _straight_count([c >> 2 for c in cards]),
+        _straight_count(board_ranks),
+        sum(r > top for r in (high, low)),
+        sum(r in board_ranks for r in (high, low)),
+        top,
+        high - top,
+    ]
+
+
+class _Trees:
+    """
+    Conjunto de árboles de regresión compilado a arrays numpy. Cada árbol se completa hasta
+    profundidad `depth` (las hojas tempranas se prolongan con umbral +inf), de modo que recorrerlo
+    son `depth` pasos aritméticos sobre índices, vectorizados sobre árboles y filas.
+    """
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, leaves: np.ndarray, init: float):
+        self.feature = feature      # (T, 2^depth - 1)
+        self.threshold = threshold  # (T, 2^depth - 1)
+        self.leaves = leaves        # (T, 2^depth), ya multiplicadas por la tasa de aprendizaje
+        self.init = init
+        self.depth = int(np.log2(leaves.shape[1]))
+        self._base = (np.arange(feature.shape[0]) * feature.shape[1])[None, :]
+        self._leaf_base = (np.arange(leaves.shape[0]) * leaves.shape[1])[None, :]
+
+    @classmethod
+    def from_sklearn(cls, model) -> "_Trees":
+        trees = [estimator.tree_ for estimator in model.estimators_[:, 0]]
+        depth = max(1, max(tree.max_depth for tree in trees))
+        internal = (1 << depth) - 1
+        feature = np.zeros((len(trees), internal), dtype=np.int64)
+        threshold = np.full((len(trees), internal), np.inf)
+        leaves = np.zeros((len(trees), 1 << depth))
+        for t, tree in enumerate(trees):
+            stack = [(0, 0)]
+            while stack:
+                node, slot = stack.pop()
+                if slot >= internal:
+                    leaves[t, slot - internal] = tree.value[node].ravel()[0] * model.learning_rate
+                    continue
+                if tree.children_left[node] < 0:
+                    # Hoja antes de la profundidad máxima: siempre a la izquierda con el mismo valor
+                    stack.append((node, 2 * slot + 1))
+                    continue
+                feature[t, slot] = tree.feature[node]
+                threshold[t, slot] = tree.threshold[node]
+                stack.append((tree.children_left[node], 2 * slot + 1))
+                stack.append((tree.children_right[node], 2 * slot + 2))
+        return cls(feature, threshold, leaves, float(np.ravel(model.init_.constant_)[0]))
+
+    def tree_values(self, X: np.ndarray) -> np.ndarray:
+        """Valor de la hoja alcanzada en cada árbol: (filas, T)"""
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        feature, threshold = self.feature.ravel(), self.threshold.ravel()
+        flat = X.ravel()
+        rows = np.arange(len(X))[:, None] * X.shape[1]
+        node = np.zeros((len(X), self.feature.shape[0]), dtype=np.int64)
+        for _ in range(self.depth):
+            pos = self._base + node
+            node *= 2
+            node += 1 + (flat[rows + feature[pos]] > threshold[pos])
+        return self.leaves.ravel()[self._leaf_base + node - self.feature.shape[1]]
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.init + self.tree_values(X).sum(axis=1)
+
+    def deepen(self, depth: int) -> "_Trees":
+        """Mismos árboles completados hasta `depth` (cada hoja sigue siempre por la izquierda)"""
+        extra = depth - self.depth
+        if extra <= 0:
+            return self
+        trees = self.feature.shape[0]
+        feature = np.zeros((trees, (1 << depth) - 1), dtype=np.int64)
+        threshold = np.full((trees, (1 << depth) - 1), np.inf)
+        feature[:, :self.feature.shape[1]] = self.feature
+        threshold[:, :self.threshold.shape[1]] = self.threshold
+        leaves = np.zeros((trees, 1 << depth))
+        leaves[:, ::1 << extra] = self.leaves
+        return _Trees(feature, threshold, leaves, self.init)
+
+    @staticmethod
+    def concat(*groups: "_Trees") -> "_Trees":
+        """Une varios conjuntos para recorrerlos en una sola pasada (inicio 0: se suma por grupo)"""
+        depth = max(group.depth for group in groups)
+        groups = [group.deepen(depth) for group in groups]
+        return _Trees(np.vstack([g.feature for g in groups]), np.vstack([g.threshold for g in groups]),
+                      np.vstack([g.leaves for g in groups]), 0.0)
+
+    def arrays(self, prefix: str) -> Dict[str, np.ndarray]:
+        return {
+            f"{prefix}_feature": self.feature, f"{prefix}_threshold": self.threshold,
+            f"{prefix}_leaves": self.leaves, f"{prefix}_init": np.array(self.init),
+        }
+
+    @classmethod
+    def from_arrays(cls, data, prefix: str) -> "_Trees":
+        return cls(data[f"{prefix}_feature"], data[f"{prefix}_threshold"], data[f"{prefix}_leaves"],
+                   float(data[f"{prefix}_init"]))
+
+
+class EquityModel:
+    """Modelo de equidad con cota de error calibrada"""
+
+    def __init__(self, equity: _Trees, error: _Trees, error_scale: float, calibration: dict):
+        self.equity = equity
+        self.error = error
+        self.error_scale = error_scale
+        self.calibration = calibration
+        # Ambos modelos se recorren juntos: una sola pasada por petición
+        self._joint = _Trees.concat(equity, error)
+        self._split = equity.feature.shape[0]
+
+    def predict_batch(self, X) -> Tuple[np.ndarray, np.ndarray]:
+        """Equidad estimada y cota de error de cada fila de características"""
+        values = self._joint.tree_values(X)
+        equity = np.clip(self.equity.init + values[:, :self._split].sum(axis=1), 0.0, 1.0)
+        error = self.error.init + values[:, self._split:].sum(axis=1)
+        return equity, self.error_scale * np.maximum(error, 0.0)
+
+    def predict(self, hero: Sequence[int], board: Sequence[int], num_opponents: int) -> Tuple[float, float]:
+        equity, bound = self.predict_batch([equity_features(hero, board, num_opponents)])
+        return float(equity[0]), float(bound[0])
+
+    def save(self, path: str = MODEL_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.tmp.{os.getpid()}.npz"
+        np.savez(tmp, format_version=np.array(FORMAT_VERSION), error_scale=np.array(self.error_scale),
+                 calibration=np.array(json.dumps(self.calibration)),
+                 **self.equity.arrays("equity"), **self.error.arrays("error"))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str = MODEL_PATH) -> "EquityModel":
+        with np.load(path) as data:
+            if int(data["format_version"]) != FORMAT_VERSION:
+                raise ValueError(f"Modelo de equidad incompatible: {path}")
+            return cls(_Trees.from_arrays(data, "equity"), _Trees.from_arrays(data, "error"),
+                       float(data["error_scale"]), json.loads(str(data["calibration"])))
+
+
+@lru_cache(maxsize=None)
+def load_model(path: str = MODEL_PATH) -> Optional[EquityModel]:
+    """Modelo entrenado, cargado en el primer uso; None si no se ha generado"""
+    if not os.path.exists(path):
+        return None
+    return EquityModel.load(path)
+
+
+def approximate_equity(hero: Sequence[int], board: Sequence[int], num_opponents: int,
+                       tolerance: float = DEFAULT_TOLERANCE, model: Optional[EquityModel] = None) -> Optional[dict]:
+    """
+    Equidad estimada por el modelo, o None si no hay modelo, el caso queda fuera de su dominio
+    o la cota de error supera `tolerance` (el llamador debe simular).
+    """
+    model = model or load_model()
+    if model is None or not 3 <= len(board) <= 5 or not 1 <= num_opponents <= MAX_OPPONENTS:
+        return None
+    equity, bound = model.predict(hero, board, num_opponents)
+    if bound > tolerance:
+        return None
+    return {"equity": equity, "error_bound": bound, "method": "model"}
+
+
+def _label_chunk(args) -> Tuple[list, list]:
+    count, simulations, max_opponents, seed = args
+    rng = random.Random(seed)
+    features, labels = [], []
+    for _ in range(count):
+        board_size = rng.choice((3, 4, 5))
+        opponents = rng.randint(1, max_opponents)
+        cards = rng.sample(range(52), 2 + board_size)
+        equity = all_seats_equity([cards[:2]] + [None] * opponents, cards[2:], simulations=simulations,
+                                  seed=rng.randrange(1 << 30))
+        features.append(equity_features(cards[:2], cards[2:], opponents))
+        labels.append(equity["seats"][0]["equity"])
+    return features, labels
+
+
+def generate_samples(count: int, simulations: int = 2000, max_opponents: int = MAX_OPPONENTS,
+                     seed: int = 0, jobs: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    """Muestras etiquetadas con la simulación: características (count, F) y equidad (count,)"""
+    chunks = max(1, jobs * 4)
+    sizes = [count // chunks + (i < count % chunks) for i in range(chunks)]
+    tasks = [(size, simulations, max_opponents, seed * 1000 + i) for i, size in enumerate(sizes) if size]
+    if jobs > 1:
+        with ProcessPoolExecutor(jobs) as pool:
+            results = list(pool.map(_label_chunk, tasks))
+    else:
+        results = [_label_chunk(task) for task in tasks]
+    X = np.array([row for features, _ in results for row in features], dtype=np.float64)
+    y = np.array([value for _, labels in results for value in labels], dtype=np.float64)
+    return X, y
+
+
+def fit_equity_model(X: np.ndarray, y: np.ndarray, seed: int = 0, label_simulations: Optional[int] = None,
+                     n_estimators: int = 150, max_depth: int = 5) -> EquityModel:
+    """
+    Ajusta el modelo de equidad y el de error (sobre residuos fuera de muestra) con el 70 % de
+    los datos, calibra la cota con un 15 % y mide la cobertura real con el 15 % restante.
+    """
+    from sklearn.ensemble import GradientBoostingRegressor
+    from sklearn.model_selection import cross_val_predict
+
+    order = np.random.default_rng(seed).permutation(len(y))
+    train, calib, test = np.split(order, [int(len(y) * 0.7), int(len(y) * 0.85)])
+
+    def regressor(estimators, depth):
+        return GradientBoostingRegressor(n_estimators=estimators, max_depth=depth, learning_rate=0.1,
+                                         subsample=0.8, random_state=seed)
+
+    equity_model = regressor(n_estimators, max_depth)
+    residuals = np.abs(cross_val_predict(equity_model, X[train], y[train], cv=5) - y[train])
+    equity_model.fit(X[train], y[train])
+    error_model = regressor(100, 3).fit(X[train], residuals)
+
+    model = EquityModel(_Trees.from_sklearn(equity_model), _Trees.from_sklearn(error_model), 1.0, {})
+    equity, raw_bound = model.predict_batch(X[calib])
+    ratio = np.abs(equity - y[calib]) / np.maximum(raw_bound, 1e-4)
+    model.error_scale = float(np.quantile(ratio, COVERAGE))
+    model.calibration = _calibration_stats(model, X[test], y[test])
+    model.calibration.update({
+        "train_samples": int(len(train)),
+        "calibration_samples": int(len(calib)),
+        "test_samples": int(len(test)),
+        "label_simulations": label_simulations,
+        "target_coverage": COVERAGE,
+        "error_scale": model.error_scale,
+        "features": FEATURE_NAMES,
+    })
+    return model
+
+
+def _calibration_stats(model: EquityModel, X: np.ndarray, y: np.ndarray) -> dict:
+    equity, bound = model.predict_batch(X)
+    error = np.abs(equity - y)
+    served = bound <= DEFAULT_TOLERANCE
+    by_street = {}
+    for size, street in ((3, "flop"), (4, "turn"), (5, "river")):
+        mask = X[:, FEATURE_NAMES.index("board_size")] == size
+        if mask.any():
+            by_street[street] = float(error[mask].mean())
+    return {
+        "mae": float(error.mean()),
+        "rmse": float(np.sqrt(np.mean(error ** 2))),
+        "p50_error": float(np.quantile(error, 0.5)),
+        "p90_error": float(np.quantile(error, 0.9)),
+        "p95_error": float(np.quantile(error, 0.95)),
+        "max_error": float(error.max()),
+        "coverage": float(np.mean(error <= bound)),
+        "mae_by_street": by_street,
+        "served_fraction": float(served.mean()),
+        "served_mae": float(error[served].mean()) if served.any() else None,
+        "served_max_error": float(error[served].max()) if served.any() else None,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["train"])
+    parser.add_argument("--samples", type=int, default=20000)
+    parser.add_argument("--simulations", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--out", default=MODEL_PATH)
+    args = parser.parse_args(argv)
+
+    X, y = generate_samples(args.samples, args.simulations, seed=args.seed, jobs=args.jobs)
+    model = fit_equity_model(X, y, seed=args.seed, label_simulations=args.simulations)
+    model.save(args.out)
+    print(json.dumps(model.calibration, indent=2))
+    print(f"Modelo guardado en {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
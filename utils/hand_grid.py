@@ -0,0 +1,148 @@
+"""
+Equidad de las 169 clases de manos iniciales (AA, AKs, AKo...) contra N rivales al azar.
+
+En lugar de lanzar 169 simulaciones, los runouts (cartas comunitarias restantes) se comparten:
+en cada board final se evalúan una sola vez todas las combinaciones de dos cartas y las manos
+rivales, muestreadas muchas veces por board, se resuelven consultando esas fuerzas. Una
+combinación solo cuenta frente a runouts y rivales con los que no comparte cartas, lo que
+equivale a condicionar el muestreo a esa mano (eliminación de cartas correcta). La equidad de
+cada clase agrupa todas sus combinaciones no bloqueadas por el board.
+
+La cuadrícula no cambia al renombrar palos, así que se cachea por board canónico.
+Solo Texas Hold'em (manos de dos cartas).
+"""
+from functools import lru_cache
+from math import comb
+from typing import Optional, Sequence
+
+import numpy as np
+
+from core.fast_evaluator import HOLDEM_EVALUATOR, canonical_cards
+from utils.hand_strength import holding_indexes
+
+# Rangos de mayor a menor, en el orden de filas y columnas de la cuadrícula
+GRID_RANKS = "AKQJT98765432"
+
+# Runouts del board muestreados por defecto (en el turn y el river se enumeran todos).
+# La varianza dominante es la del board, no la de los rivales: más runouts con pocos rivales cada uno
+DEFAULT_SIMULATIONS = 300
+# Antes del flop la varianza entre boards es mucho mayor; solo hay una cuadrícula por número de rivales
+PREFLOP_SIMULATIONS = 1000
+
+# Conjuntos de manos rivales por runout: solo cuestan consultas a la tabla de fuerzas del board
+OPPONENT_SAMPLES = 16
+
+
+def class_name(row: int, col: int) -> str:
+    """Nombre de la clase en la celda (row, col): pares en la diagonal, suited por encima"""
+    high, low = GRID_RANKS[min(row, col)], GRID_RANKS[max(row, col)]
+    if row == col:
+        return high + low
+    return high + low + ("s" if row < col else "o")
+
+
+def _grid_cell(combos: np.ndarray) -> np.ndarray:
+    """Fila y columna de la cuadrícula de cada combinación (N, 2) de cartas codificadas"""
+    rows = 12 - np.maximum(combos[:, 0] >> 2, combos[:, 1] >> 2)
+    cols = 12 - np.minimum(combos[:, 0] >> 2, combos[:, 1] >> 2)
+    suited = (combos[:, 0] & 3) == (combos[:, 1] & 3)
+    # Suited por encima de la diagonal (fila < columna); offsuit por debajo
+    return np.where(suited, rows, cols), np.where(suited, cols, rows)
+
+
+def hand_class_equities(board: Sequence[int], num_opponents: int = 1, simulations: Optional[int] = None,
+                        dead: Sequence[int] = ()) -> dict:
+    """
+    Equidad de las 169 clases contra `num_opponents` rivales con manos al azar en el board dado
+    (0, 3, 4 o 5 cartas). `dead` son cartas conocidas fuera de juego. `simulations` es el número
+    de runouts del board (por defecto DEFAULT_SIMULATIONS, o PREFLOP_SIMULATIONS sin board).
+    Devuelve la cuadrícula 13x13 (None en clases imposibles) y el detalle por clase.
+    """
+    if len(board) not in (0, 3, 4, 5):
+        raise ValueError("El board debe tener 0, 3, 4 o 5 cartas")
+    if not 1 <= num_opponents <= 9:
+        raise ValueError("El número de rivales debe estar entre 1 y 9")
+    if simulations is None:
+        simulations = DEFAULT_SIMULATIONS if board else PREFLOP_SIMULATIONS
+    board, dead = canonical_cards(board, dead)
+    return dict(_hand_class_equities(board, dead, num_opponents, simulations))
+
+
+@lru_cache(maxsize=256)
+def _hand_class_equities(board: tuple, dead: tuple, num_opponents: int, simulations: int) -> dict:
+    known = set(board) | set(dead)
+    deck = np.array([c for c in range(52) if c not in known], dtype=np.int64)
+    combos = deck[holding_indexes(len(deck), 2)]
+    to_come = 5 - len(board)
+    if to_come + 2 * num_opponents + 2 > len(deck):
+        raise ValueError("No quedan cartas suficientes para tantos rivales")
+
+    # Runouts del board: todos si caben en `simulations` (turn, river), si no una muestra
+    rng = np.random.default_rng(0)
+    if comb(len(deck), to_come) <= simulations:
+        method = "enumeration"
+        runouts = deck[holding_indexes(len(deck), to_come)] if to_come else np.zeros((1, 0), dtype=np.int64)
+    else:
+        method = "monte_carlo"
+        positions = rng.random((simulations, len(deck))).argsort(axis=1)[:, :to_come]
+        # Muestreo estratificado: la primera carta por venir recorre la baraja por igual
+        first = np.resize(rng.permutation(len(deck)), simulations)
+        clash = positions == first[:, None]
+        positions[clash] = positions[:, 0][clash.nonzero()[0]]
+        positions[:, 0] = first
+        runouts = deck[positions]
+
+    one = np.int64(1)
+    combo_masks = (one << combos[:, 0]) | (one << combos[:, 1])
+    board_arr = np.array(board, dtype=np.int64)
+    share = np.zeros(len(combos))
+    samples = np.zeros(len(combos))
+    strength = np.zeros((52, 52), dtype=np.int64)
+    for runout in runouts:
+        final_board = np.concatenate([board_arr, runout])
+        runout_mask = np.bitwise_or.reduce(one << runout, initial=0)
+        live = np.flatnonzero((combo_masks & runout_mask) == 0)
+        hero = HOLDEM_EVALUATOR.evaluate_batch(
+            np.hstack([combos[live], np.broadcast_to(final_board, (len(live), 5))]))
+        # Fuerza de cada par de cartas en este board: las manos rivales se consultan sin reevaluar
+        strength[combos[live, 0], combos[live, 1]] = hero
+        strength[combos[live, 1], combos[live, 0]] = hero
+
+        rest = deck[~np.isin(deck, runout)]
+        opp = rest[rng.random((OPPONENT_SAMPLES, len(rest))).argsort(axis=1)[:, :2 * num_opponents]]
+        opp_strength = strength[opp[:, 0::2], opp[:, 1::2]]
+        best = opp_strength.max(axis=1)
+        tied = (opp_strength == best[:, None]).sum(axis=1)
+        opp_masks = np.bitwise_or.reduce(one << opp, axis=1)
+
+        valid = (combo_masks[live, None] & opp_masks[None, :]) == 0
+        wins = np.count_nonzero(valid & (hero[:, None] > best), axis=1)
+        ties = (valid & (hero[:, None] == best)) @ (1.0 / (tied + 1))
+        share[live] += wins + ties
+        samples[live] += np.count_nonzero(valid, axis=1)
+
+    rows, cols = _grid_cell(combos)
+    cell = rows * 13 + cols
+    cell_share = np.bincount(cell, weights=share, minlength=169)
+    cell_samples = np.bincount(cell, weights=samples, minlength=169)
+    cell_combos = np.bincount(cell, minlength=169)
+    grid = [[None] * 13 for _ in range(13)]
+    classes = {}
+    for idx in range(169):
+        row, col = divmod(idx, 13)
+        equity: Optional[float] = float(cell_share[idx] / cell_samples[idx]) if cell_samples[idx] else None
+        grid[row][col] = equity
+        classes[class_name(row, col)] = {
+            "equity": equity,
+            "combos": int(cell_combos[idx]),
+            "samples": int(cell_samples[idx]),
+        }
+    return {
+        "ranks": list(GRID_RANKS),
+        "grid": grid,
+        "classes": classes,
+        "num_opponents": num_opponents,
+        "runouts": len(runouts),
+        "opponent_samples": OPPONENT_SAMPLES,
+        "method": method,
+    }
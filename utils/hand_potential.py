@@ -0,0 +1,127 @@
+"""
+Fuerza efectiva de la mano (EHS) y potencial positivo/negativo (PPot/NPot), según
+Billings et al.: se combina cada mano rival posible con cada completado del board (turn y/o
+river) y se cuenta cómo pasa el jugador de ir delante/empatado/detrás a ganar/empatar/perder.
+
+En el flop son ~1,07 millones de evaluaciones, que se hacen por bloques con el evaluador por
+lotes. Si superan `max_evaluations` (en evaluaciones de 5 cartas, de modo que Omaha cuenta sus
+combinaciones por mano) se muestrea un subconjunto de runouts y, si no basta, de manos rivales.
+Los resultados se cachean por board canónico.
+"""
+from functools import lru_cache
+from itertools import combinations
+from math import comb
+from typing import Sequence
+
+import numpy as np
+
+from core.fast_evaluator import canonical_cards
+from core.variants import HOLDEM, GameVariant
+from utils.hand_strength import sample_holdings
+
+AHEAD, TIED, BEHIND = 0, 1, 2
+
+# Presupuesto por defecto: cubre la enumeración completa en el flop (1081 x 990)
+MAX_EVALUATIONS = 1_200_000
+
+# Runouts mínimos que se conservan al muestrear antes de recortar manos rivales
+MIN_RUNOUTS = 50
+
+# Filas por bloque de evaluación, para acotar la memoria
+_CHUNK_ROWS = 200_000
+
+
+def hand_potential(hero: Sequence[int], board: Sequence[int], num_opponents: int = 1,
+                   max_evaluations: int = MAX_EVALUATIONS, variant: GameVariant = HOLDEM) -> dict:
+    """
+    HS, PPot, NPot, EHS y EHS² de la mano `hero` con el board actual (3 a 5 cartas).
+    HS, EHS y EHS² se ajustan a `num_opponents` rivales como HS^n (aproximación de Billings);
+    en EHS² se eleva la fuerza de cada river, E[(HS_river^n)²].
+    """
+    if not 3 <= len(board) <= 5:
+        raise ValueError("Se requieren entre 3 y 5 cartas comunitarias")
+    hero, board = canonical_cards(hero, board)
+    result = dict(_hand_potential(hero, board, variant, max_evaluations))
+    river_hs = result.pop("river_hs")
+    hs = result["hand_strength"] ** num_opponents
+    result["hand_strength"] = hs
+    result["ehs"] = hs * (1 - result["npot"]) + (1 - hs) * result["ppot"]
+    result["ehs2"] = float(np.mean(river_hs ** (2 * num_opponents)))
+    result["num_opponents"] = num_opponents
+    return result
+
+
+def _relation(hero, opponent):
+    return np.where(hero > opponent, AHEAD, np.where(hero == opponent, TIED, BEHIND))
+
+
+@lru_cache(maxsize=1024)
+def _hand_potential(hero: tuple, board: tuple, variant: GameVariant, max_evaluations: int) -> dict:
+    dead = set(hero) | set(board)
+    remaining = np.array([c for c in variant.deck_ints() if c not in dead], dtype=np.int64)
+    cost = variant.combinations_per_hand()
+    opp_pos = sample_holdings(len(remaining), variant.hole_cards, max(1, max_evaluations // cost))
+    opponents = remaining[opp_pos]
+    board_arr = np.array(board, dtype=np.int64)
+
+    current_opp = variant.evaluate_batch(opponents, np.broadcast_to(board_arr, (len(opponents), len(board))))
+    current_hero = int(variant.evaluate_batch([hero], [board])[0])
+    current = _relation(current_hero, current_opp)
+    counts = np.bincount(current, minlength=3)
+    hs = (counts[AHEAD] + counts[TIED] / 2) / len(opponents)
+
+    to_come = 5 - len(board)
+    if to_come == 0:
+        return {"hand_strength": hs, "ppot": 0.0, "npot": 0.0, "river_hs": np.array([hs]),
+                "method": "enumeration", "evaluations": len(opponents)}
+
+    run_pos = np.array(list(combinations(range(len(remaining)), to_come)), dtype=np.int64)
+    method = "enumeration" if len(opponents) == comb(len(remaining), variant.hole_cards) else "monte_carlo"
+    # Muestreo determinista para que el resultado cacheado sea reproducible
+    rng = np.random.default_rng(0)
+    if len(opponents) * len(run_pos) * cost > max_evaluations:
+        keep = min(len(run_pos), max(MIN_RUNOUTS, max_evaluations // (len(opponents) * cost)))
+        run_pos = run_pos[np.sort(rng.choice(len(run_pos), keep, replace=False))]
+        method = "monte_carlo"
+    if len(opponents) * len(run_pos) * cost > max_evaluations:
+        keep = max(1, max_evaluations // (len(run_pos) * cost))
+        chosen = np.sort(rng.choice(len(opponents), keep, replace=False))
+        opp_pos, opponents, current = opp_pos[chosen], opponents[chosen], current[chosen]
+    runouts = remaining[run_pos]
+    final_boards = np.hstack([np.broadcast_to(board_arr, (len(runouts), len(board))), runouts])
+    final_hero = variant.evaluate_batch(np.broadcast_to(np.array(hero), (len(runouts), len(hero))), final_boards)
+
+    one = np.int64(1)
+    opp_masks = (one << opp_pos).sum(axis=1)
+    run_masks = (one << run_pos).sum(axis=1)
+    transitions = np.zeros(9, dtype=np.int64)
+    river_score = np.zeros(len(runouts))
+    river_total = np.zeros(len(runouts))
+    evaluations = len(opponents) * cost
+    step = max(1, _CHUNK_ROWS // (len(runouts) * cost))
+    for start in range(0, len(opponents), step):
+        oi, ri = np.nonzero((opp_masks[start:start + step, None] & run_masks[None, :]) == 0)
+        oi += start
+        final_opp = variant.evaluate_batch(opponents[oi], final_boards[ri])
+        final = _relation(final_hero[ri], final_opp)
+        transitions += np.bincount(current[oi] * 3 + final, minlength=9)
+        river_score += np.bincount(ri, weights=(final == AHEAD) + (final == TIED) / 2, minlength=len(runouts))
+        river_total += np.bincount(ri, minlength=len(runouts))
+        evaluations += len(oi) * cost
+
+    hp = transitions.reshape(3, 3)
+    totals = hp.sum(axis=1)
+    ppot_den = totals[BEHIND] + totals[TIED] / 2
+    npot_den = totals[AHEAD] + totals[TIED] / 2
+    ppot = (hp[BEHIND, AHEAD] + hp[BEHIND, TIED] / 2 + hp[TIED, AHEAD] / 2) / ppot_den if ppot_den else 0.0
+    npot = (hp[AHEAD, BEHIND] + hp[TIED, BEHIND] / 2 + hp[AHEAD, TIED] / 2) / npot_den if npot_den else 0.0
+    river_hs = river_score[river_total > 0] / river_total[river_total > 0]
+    return {
+        "hand_strength": float(hs),
+        "ppot": float(ppot),
+        "npot": float(npot),
+        # Fuerza frente a un rival en cada river; EHS² se calcula según el número de rivales
+        "river_hs": river_hs,
+        "method": method,
+        "evaluations": int(evaluations),
+    }
@@ -0,0 +1,73 @@
+"""
+Fuerza exacta de la mano: fracción de todas las manos rivales posibles a las que la mano del
+jugador gana, empata o pierde con el board actual.
+
+Las manos rivales se enumeran en un solo lote y sus fuerzas se acumulan en un histograma sobre
+las clases de equivalencia de la tabla del evaluador, de modo que cada consulta cuesta una
+pasada por la tabla. Los resultados se cachean por board canónico (palos normalizados).
+En variantes con muchas manos rivales posibles (Omaha: C(45,4)) se usa una muestra fija.
+"""
+from functools import lru_cache
+from itertools import combinations
+from math import comb
+from typing import Sequence
+
+import numpy as np
+
+from core.fast_evaluator import canonical_cards
+from core.variants import HOLDEM, GameVariant
+
+# Manos rivales máximas a evaluar antes de pasar a muestreo
+MAX_HOLDINGS = 20000
+
+
+@lru_cache(maxsize=64)
+def holding_indexes(n: int, k: int = 2) -> np.ndarray:
+    """Array (C(n,k), k) con todas las combinaciones de k posiciones de una baraja de n cartas"""
+    return np.array(list(combinations(range(n), k)), dtype=np.int64).reshape(-1, k)
+
+
+def sample_holdings(n: int, k: int, limit: int) -> np.ndarray:
+    """Todas las combinaciones de k posiciones o, si son más de `limit`, una muestra determinista"""
+    if comb(n, k) <= limit:
+        return holding_indexes(n, k)
+    rng = np.random.default_rng(0)
+    rows = np.sort(rng.random((limit * 2, n)).argsort(axis=1)[:, :k], axis=1)
+    _, first = np.unique(rows, axis=0, return_index=True)
+    return rows[np.sort(first)][:limit]
+
+
+def hand_strength(hero: Sequence[int], board: Sequence[int], variant: GameVariant = HOLDEM,
+                  max_holdings: int = MAX_HOLDINGS) -> dict:
+    """Gana/empata/pierde contra todas las manos rivales posibles, con el board actual (3 a 5 cartas)"""
+    if not 3 <= len(board) <= 5:
+        raise ValueError("Se requieren entre 3 y 5 cartas comunitarias")
+    hero, board = canonical_cards(hero, board)
+    return dict(_hand_strength(hero, board, variant, max_holdings))
+
+
+@lru_cache(maxsize=4096)
+def _hand_strength(hero: tuple, board: tuple, variant: GameVariant, max_holdings: int) -> dict:
+    evaluator = variant.evaluator
+    dead = set(hero) | set(board)
+    remaining = np.array([c for c in variant.deck_ints() if c not in dead], dtype=np.int64)
+    positions = sample_holdings(len(remaining), variant.hole_cards, max_holdings)
+    opponents = remaining[positions]
+    board_cards = np.broadcast_to(np.array(board, dtype=np.int64), (len(opponents), len(board)))
+    strengths = variant.evaluate_batch(opponents, board_cards)
+    hero_strength = int(variant.evaluate_batch([hero], [board])[0])
+
+    histogram = np.bincount(strengths, minlength=evaluator.num_classes + 1)
+    total = float(len(opponents))
+    beats = float(histogram[:hero_strength].sum()) / total
+    ties = float(histogram[hero_strength]) / total
+    return {
+        "hand_class": hero_strength,
+        "combinations": len(opponents),
+        "method": "enumeration" if comb(len(remaining), variant.hole_cards) <= max_holdings else "monte_carlo",
+        "beats": beats,
+        "ties": ties,
+        "loses": 1.0 - beats - ties,
+        "strength_percentile": beats + ties / 2,
+        "class_percentile": evaluator.class_percentile(hero_strength),
+    }
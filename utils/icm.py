@@ -0,0 +1,135 @@
+"""
+Independent Chip Model (ICM, modelo de Malmuth-Harville) para mesas finales.
+
+La probabilidad de que un jugador termine primero entre los que quedan es proporcional a sus
+fichas. En lugar de enumerar los n! órdenes de llegada se recorre una programación dinámica
+sobre máscaras de bits de los jugadores aún sin puesto (O(n·2^n)), vectorizada sobre un lote
+de vectores de stacks: evaluar miles de escenarios hipotéticos cuesta casi lo mismo que uno.
+Para campos grandes se usa Monte Carlo: bajo Harville, ordenar Exp(1)/stack reproduce
+exactamente la distribución de órdenes de llegada.
+"""
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from core.player import Player
+
+# Hasta este número de jugadores se usa la programación dinámica exacta
+EXACT_MAX_PLAYERS = 12
+
+# Vectores de stacks por bloque en el cálculo exacto, para acotar la memoria (B x 2^n)
+_BATCH_CHUNK = 1024
+
+
+def icm_equity(stacks: Sequence[float], payouts: Sequence[float], samples: int = 100000,
+               seed: Optional[int] = None) -> List[float]:
+    """Equidad ICM de cada jugador (en las unidades de `payouts`)"""
+    _check_non_negative(stacks, payouts)
+    if len(stacks) > EXACT_MAX_PLAYERS:
+        return icm_equity_monte_carlo(stacks, payouts, samples, seed).tolist()
+    return list(_icm_cached(tuple(float(s) for s in stacks), tuple(float(p) for p in payouts)))
+
+
+@lru_cache(maxsize=4096)
+def _icm_cached(stacks: tuple, payouts: tuple) -> tuple:
+    return tuple(icm_equity_batch([stacks], payouts)[0].tolist())
+
+
+def icm_equity_batch(stacks, payouts: Sequence[float], samples: int = 100000,
+                     seed: Optional[int] = None) -> np.ndarray:
+    """
+    Equidad ICM de un lote de vectores de stacks: `stacks` es (B, n) y devuelve (B, n).
+    Exacta hasta EXACT_MAX_PLAYERS jugadores; con más, cada fila se estima por Monte Carlo
+    con `samples` muestras. Los jugadores con 0 fichas quedan por detrás de todos los demás.
+    """
+    stacks = np.atleast_2d(np.asarray(stacks, dtype=np.float64))
+    _check_non_negative(stacks, payouts)
+    n = stacks.shape[1]
+    if n > EXACT_MAX_PLAYERS:
+        rng = np.random.default_rng(seed)
+        return np.vstack([icm_equity_monte_carlo(row, payouts, samples, rng) for row in stacks])
+    payouts = np.zeros(n) if len(payouts) == 0 else np.asarray(payouts, dtype=np.float64)[:n]
+    return np.vstack([_icm_chunk(stacks[i:i + _BATCH_CHUNK], payouts)
+                      for i in range(0, len(stacks), _BATCH_CHUNK)])
+
+
+def _icm_chunk(stacks: np.ndarray, payouts: np.ndarray) -> np.ndarray:
+    batch, n = stacks.shape
+    full = (1 << n) - 1
+    popcount = _popcounts(n)
+    # Disposición (máscara, lote) para que cada paso lea y escriba filas contiguas
+    by_player = np.ascontiguousarray(stacks.T)
+    # Suma de fichas de cada subconjunto de jugadores
+    totals = _membership(n).T @ by_player
+    reach = np.zeros((full + 1, batch))
+    reach[full] = 1.0
+    equity = np.zeros((n, batch))
+    # Se asignan los puestos de arriba abajo: los conjuntos con más jugadores van primero
+    for mask in _masks_by_size(n):
+        place = n - popcount[mask]
+        if place >= len(payouts):
+            continue
+        members = _members(n)[mask]
+        total = totals[mask]
+        # Si solo quedan jugadores sin fichas, se reparten los puestos por igual
+        share = np.where(total > 0, by_player[members] / np.where(total > 0, total, 1.0), 1.0 / len(members))
+        prob = reach[mask] * share
+        equity[members] += prob * payouts[place]
+        reach[mask ^ (1 << members)] += prob
+    return equity.T
+
+
+def _check_non_negative(stacks, payouts):
+    if np.any(np.asarray(stacks, dtype=np.float64) < 0):
+        raise ValueError("Los stacks no pueden ser negativos")
+    if np.any(np.asarray(payouts, dtype=np.float64) < 0):
+        raise ValueError("Los premios no pueden ser negativos")
+
+
+@lru_cache(maxsize=None)
+def _popcounts(n: int) -> np.ndarray:
+    return np.array([bin(m).count("1") for m in range(1 << n)])
+
+
+@lru_cache(maxsize=None)
+def _membership(n: int) -> np.ndarray:
+    """Matriz (n, 2^n): 1 si el jugador i pertenece a la máscara"""
+    masks = np.arange(1 << n)
+    return ((masks[None, :] >> np.arange(n)[:, None]) & 1).astype(np.float64)
+
+
+@lru_cache(maxsize=None)
+def _members(n: int) -> tuple:
+    """Índices de los jugadores de cada máscara"""
+    return tuple(np.array([i for i in range(n) if m >> i & 1], dtype=np.int64) for m in range(1 << n))
+
+
+@lru_cache(maxsize=None)
+def _masks_by_size(n: int) -> tuple:
+    popcount = _popcounts(n)
+    return tuple(sorted(range(1, 1 << n), key=lambda m: -popcount[m]))
+
+
+def icm_equity_monte_carlo(stacks: Sequence[float], payouts: Sequence[float], samples: int = 100000,
+                           seed=None) -> np.ndarray:
+    """Aproximación Monte Carlo del ICM para campos grandes (`seed`: semilla o numpy Generator)"""
+    stacks = np.asarray(stacks, dtype=np.float64)
+    n = len(stacks)
+    prizes = np.zeros(n)
+    prizes[:min(n, len(payouts))] = np.asarray(payouts, dtype=np.float64)[:n]
+    rng = np.random.default_rng(seed)
+    with np.errstate(divide="ignore"):
+        clocks = rng.exponential(size=(samples, n)) / stacks
+    # Orden de llegada: el menor "reloj" termina primero
+    order = np.argsort(clocks, axis=1)
+    equity = np.zeros(n)
+    np.add.at(equity, order, np.broadcast_to(prizes, (samples, n)))
+    return equity / samples
+
+
+def table_icm(players: Sequence[Player], payouts: Sequence[float]) -> List[Dict[str, float]]:
+    """Equidad ICM de los jugadores de una mesa a partir de `Player.chips`, en orden de asiento"""
+    equity = icm_equity([player.chips for player in players], payouts)
+    return [{"name": player.name, "chips": player.chips, "equity": value}
+            for player, value in zip(players, equity)]
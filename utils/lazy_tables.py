@@ -0,0 +1,124 @@
+"""
+Tablas precalculadas con carga diferida.
+
+Las tablas pesadas (evaluador, preflop, texturas...) no se construyen ni se leen al importar:
+la primera llamada a `LazyTable.get()` las abre como ficheros .npy mapeados en memoria
+(`numpy.load(..., mmap_mode='r')`), de modo que el arranque en frío de la función serverless
+solo paga por las páginas que realmente se tocan.
+
+Orden de búsqueda de cada tabla:
+1. `data/tables/<nombre>-v<versión>/` dentro del repositorio (generadas con
+   `python -m utils.lazy_tables build` y versionadas en git, así viajan en el paquete desplegado).
+2. `$POKER_TABLE_CACHE` (por defecto `/tmp/poker_tables`), el único directorio escribible en Vercel.
+3. Si no existen, se construyen con la función `builder` y se guardan en (2).
+"""
+import os
+import threading
+from typing import Callable, Dict
+
+PACKAGED_TABLE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "tables")
+CACHE_TABLE_DIR = os.environ.get("POKER_TABLE_CACHE", os.path.join("/tmp", "poker_tables"))
+
+# Registro de todas las tablas declaradas, para el build y el benchmark de arranque
+TABLES: Dict[str, "LazyTable"] = {}
+
+
+class LazyTable:
+    """
+    Conjunto de arrays numpy con nombre que se carga en el primer uso.
+    `builder` devuelve un dict {clave: numpy.ndarray}; cada array se guarda como <clave>.npy.
+    Incrementa `version` al cambiar el contenido para no reutilizar cachés antiguas.
+    """
+
+    def __init__(self, name: str, builder: Callable[[], Dict[str, "object"]], version: int = 1):
+        self.name = name
+        self.version = version
+        self.builder = builder
+        self._arrays = None
+        self._lock = threading.Lock()
+        TABLES[name] = self
+
+    @property
+    def loaded(self) -> bool:
+        return self._arrays is not None
+
+    def get(self) -> Dict[str, "object"]:
+        """Devuelve los arrays de la tabla, cargándolos (o construyéndolos) la primera vez"""
+        arrays = self._arrays
+        if arrays is None:
+            with self._lock:
+                if self._arrays is None:
+                    self._arrays = self._load_or_build()
+                arrays = self._arrays
+        return arrays
+
+    @property
+    def dirname(self) -> str:
+        return f"{self.name}-v{self.version}"
+
+    def __getitem__(self, key: str):
+        return self.get()[key]
+
+    def build(self, directory: str) -> str:
+        """Construye la tabla y la escribe en `directory`; devuelve la ruta de la tabla"""
+        import numpy as np
+        path = os.path.join(directory, self.dirname)
+        os.makedirs(path, exist_ok=True)
+        for key, array in self.builder().items():
+            # Escritura atómica: otro proceso puede estar leyendo la misma caché
+            tmp = os.path.join(path, f".{key}.{os.getpid()}.npy")
+            np.save(tmp, np.ascontiguousarray(array))
+            os.replace(tmp, os.path.join(path, f"{key}.npy"))
+        with open(os.path.join(path, ".complete"), "w"):
+            pass
+        return path
+
+    def _load_or_build(self) -> Dict[str, "object"]:
+        for directory in (PACKAGED_TABLE_DIR, CACHE_TABLE_DIR):
+            arrays = self._load(os.path.join(directory, self.dirname))
+            if arrays is not None:
+                return arrays
+        try:
+            path = self.build(CACHE_TABLE_DIR)
+        except OSError:
+            # Sistema de ficheros de solo lectura: se usa la tabla en memoria
+            return self.builder()
+        return self._load(path) or self.builder()
+
+    @staticmethod
+    def _load(path: str):
+        if not os.path.exists(os.path.join(path, ".complete")):
+            return None
+        import numpy as np
+        return {
+            entry[:-4]: np.load(os.path.join(path, entry), mmap_mode="r")
+            for entry in os.listdir(path)
+            if entry.endswith(".npy") and not entry.startswith(".")
+        }
+
+
+def build_all(directory: str = PACKAGED_TABLE_DIR):
+    """Genera todas las tablas registradas (paso de build previo al despliegue)"""
+    _register_tables()
+    for table in TABLES.values():
+        print(f"[lazy_tables] {table.name} -> {table.build(directory)}")
+
+
+def _register_tables():
+    """Importa los módulos que declaran tablas para que queden en el registro"""
+    for module in TABLE_MODULES:
+        __import__(module)
+
+
+# Módulos que declaran instancias de LazyTable
+TABLE_MODULES = ["core.fast_evaluator"]
+
+
+if __name__ == "__main__":
+    import sys
+    # Con `python -m` este módulo es __main__, pero las tablas se registran en utils.lazy_tables
+    from utils.lazy_tables import build_all as _build_all
+    if len(sys.argv) >= 2 and sys.argv[1] == "build":
+        _build_all(sys.argv[2] if len(sys.argv) > 2 else PACKAGED_TABLE_DIR)
+    else:
+        print("Uso: python -m utils.lazy_tables build [directorio]")
@@ -0,0 +1,339 @@
+"""
+Solver de decisiones en el river para botes heads-up.
+
+Construye el árbol de apuestas (check/apuesta/fold/call/subida con un conjunto pequeño de
+tamaños) a partir del bote y los stacks, y lo resuelve con CFR+ vectorizado sobre los rangos
+de ambos jugadores. Los valores de showdown mano-contra-rango se calculan en O(manos) con
+sumas acumuladas ordenadas por fuerza y corrección de bloqueadores por carta, y se
+memorizan por board. Las soluciones completas se cachean para reutilizarlas.
+Solo Hold'em (combinaciones de dos cartas de la baraja de 52).
+"""
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from itertools import combinations
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.fast_evaluator import HOLDEM_EVALUATOR
+
+# Tamaños de apuesta por defecto, como fracción del bote
+DEFAULT_BET_SIZES = (0.5, 1.0)
+# El árbol crece con el cuadrado del número de tamaños: se acotan número y tamaño máximo
+MAX_BET_SIZES = 4
+MAX_BET_SIZE = 5.0
+DEFAULT_ITERATIONS = 300
+# Soluciones completas que se conservan en caché
+SOLUTION_CACHE_SIZE = 32
+
+Combo = Tuple[int, int]
+
+
+class _Node:
+    """Nodo del árbol de apuestas: decisión, fold o showdown"""
+    __slots__ = ("kind", "player", "actions", "children", "contrib", "folder", "regret", "strategy_sum")
+
+    def __init__(self, kind: str, player: int = -1, contrib: Tuple[int, int] = (0, 0), folder: int = -1):
+        self.kind = kind
+        self.player = player
+        self.actions: List[str] = []
+        self.children: List["_Node"] = []
+        self.contrib = contrib
+        self.folder = folder
+        self.regret = None
+        self.strategy_sum = None
+
+
+def build_tree(pot: int, stack: int, bet_sizes: Sequence[float] = DEFAULT_BET_SIZES, max_raises: int = 1) -> _Node:
+    """
+    Árbol de apuestas del river; el jugador 0 actúa primero. `stack` es el stack efectivo.
+    Las acciones se etiquetan con la cantidad en fichas ('BET 50 (50%)', o el total tras subir en
+    'RAISE 150 (75%)'): tamaños que dan la misma cantidad se funden en una sola acción.
+    """
+
+    def decision(player: int, contrib: Tuple[int, int], raises: int, checked: bool) -> _Node:
+        node = _Node("decision", player, contrib)
+        mine, other = contrib[player], contrib[1 - player]
+        to_call = other - mine
+
+        def add(action: str, child: _Node):
+            node.actions.append(action)
+            node.children.append(child)
+
+        def wager(total: int) -> Tuple[int, int]:
+            return (total, other) if player == 0 else (other, total)
+
+        if to_call == 0:
+            if player == 0:
+                add("CHECK", decision(1, contrib, raises, True))
+            else:
+                add("CHECK", _Node("showdown", contrib=contrib))
+            if stack > mine:
+                amounts = set()
+                for size in bet_sizes:
+                    amount = int(round(size * (pot + mine + other)))
+                    if 0 < amount < stack - mine and amount not in amounts:
+                        amounts.add(amount)
+                        add(f"BET {amount} ({round(size * 100)}%)",
+                            decision(1 - player, wager(mine + amount), raises, checked))
+                add("ALL-IN", decision(1 - player, wager(stack), raises, checked))
+        else:
+            add("FOLD", _Node("fold", contrib=contrib, folder=player))
+            add("CALL", _Node("showdown", contrib=wager(min(other, stack))))
+            if raises < max_raises and stack > other:
+                totals = set()
+                for size in bet_sizes:
+                    total = other + int(round(size * (pot + 2 * other)))
+                    if other < total < stack and total not in totals:
+                        totals.add(total)
+                        add(f"RAISE {total} ({round(size * 100)}%)",
+                            decision(1 - player, wager(total), raises + 1, checked))
+                add("ALL-IN", decision(1 - player, wager(stack), raises + 1, checked))
+        return node
+
+    return decision(0, (0, 0), 0, False)
+
+
+def all_combos(dead: Sequence[int] = ()) -> List[Combo]:
+    """Todas las combinaciones de dos cartas que no contienen cartas muertas"""
+    dead = set(dead)
+    return [combo for combo in combinations(range(52), 2) if not dead.intersection(combo)]
+
+
+class _Showdown:
+    """
+    Valores de showdown de las manos de un jugador contra el rango (alcance) del rival,
+    excluyendo combinaciones que comparten cartas. Las manos rivales se ordenan por fuerza, en
+    conjunto y agrupadas por carta, así que cada evaluación son dos sumas acumuladas: O(manos).
+    """
+
+    def __init__(self, mine: np.ndarray, my_strength: np.ndarray, opp: np.ndarray, opp_strength: np.ndarray):
+        self.n_opp = len(opp)
+        self.order = np.argsort(opp_strength, kind="stable")
+        sorted_strength = opp_strength[self.order]
+        self.lower = np.searchsorted(sorted_strength, my_strength, side="left")
+        self.upper = np.searchsorted(sorted_strength, my_strength, side="right")
+
+        # Manos rivales agrupadas por carta (cada mano aparece en los grupos de sus dos cartas)
+        by_card = [np.flatnonzero((opp[self.order] == card).any(axis=1)) for card in range(52)]
+        self.flat = self.order[np.concatenate(by_card)] if self.n_opp else np.zeros(0, dtype=np.int64)
+        starts = np.concatenate([[0], np.cumsum([len(g) for g in by_card])])
+        group_strength = [sorted_strength[g] for g in by_card]
+        # Para cada carta de cada mano propia: inicio, fin y cortes (<, <=) dentro de su grupo
+        self.card_bounds = []
+        for column in (0, 1):
+            cards = mine[:, column]
+            lo = np.array([np.searchsorted(group_strength[c], s, side="left") for c, s in zip(cards, my_strength)],
+                          dtype=np.int64)
+            hi = np.array([np.searchsorted(group_strength[c], s, side="right") for c, s in zip(cards, my_strength)],
+                          dtype=np.int64)
+            base = starts[cards]
+            self.card_bounds.append((base, base + lo, base + hi, starts[cards + 1]))
+        index = {tuple(combo): i for i, combo in enumerate(opp.tolist())}
+        self.same = np.array([index.get(tuple(combo), -1) for combo in mine.tolist()], dtype=np.int64)
+
+    def evaluate(self, reach: np.ndarray, with_net: bool = True):
+        """Devuelve (ganadas - perdidas, total compatible) ponderadas por el alcance del rival"""
+        cum = np.concatenate([[0.0], np.cumsum(reach[self.order])])
+        card_cum = np.concatenate([[0.0], np.cumsum(reach[self.flat])])
+        same = np.where(self.same >= 0, reach[np.maximum(self.same, 0)], 0.0)
+        win, not_lose, total = cum[self.lower], cum[self.upper] + same, cum[-1] + same
+        for base, lo, hi, end in self.card_bounds:
+            start = card_cum[base]
+            total = total - (card_cum[end] - start)
+            if with_net:
+                win = win - (card_cum[lo] - start)
+                not_lose = not_lose - (card_cum[hi] - start)
+        if not with_net:
+            return None, total
+        return win - (total - not_lose), total
+
+
+@lru_cache(maxsize=64)
+def _showdown_pair(board: tuple, hands0: tuple, hands1: tuple):
+    """Estructuras de showdown memorizadas por board y rangos (una por perspectiva)"""
+    h0 = np.array(hands0, dtype=np.int64).reshape(-1, 2)
+    h1 = np.array(hands1, dtype=np.int64).reshape(-1, 2)
+    board_arr = np.array(board, dtype=np.int64)
+    s0 = HOLDEM_EVALUATOR.evaluate_batch(np.hstack([h0, np.broadcast_to(board_arr, (len(h0), 5))]))
+    s1 = HOLDEM_EVALUATOR.evaluate_batch(np.hstack([h1, np.broadcast_to(board_arr, (len(h1), 5))]))
+    return _Showdown(h0, s0, h1, s1), _Showdown(h1, s1, h0, s0)
+
+
+class RiverSolver:
+    """CFR+ sobre el árbol de apuestas del river con rangos de ambos jugadores"""
+
+    def __init__(self, board: Sequence[int], ranges: Tuple[Dict[Combo, float], Dict[Combo, float]],
+                 pot: int, stack: int, bet_sizes: Sequence[float] = DEFAULT_BET_SIZES, max_raises: int = 1):
+        if len(board) != 5:
+            raise ValueError("El solver de river requiere las 5 cartas comunitarias")
+        self.board = tuple(sorted(board))
+        self.pot = pot
+        self.stack = stack
+        self.hands = [sorted(r) for r in ranges]
+        self.weights = [np.array([ranges[p][h] for h in self.hands[p]], dtype=np.float64) for p in (0, 1)]
+        self.root = build_tree(pot, stack, bet_sizes, max_raises)
+        self.showdown = _showdown_pair(self.board, tuple(self.hands[0]), tuple(self.hands[1]))
+        self.iterations = 0
+        self._init_nodes(self.root)
+
+    def _init_nodes(self, node: _Node):
+        if node.kind != "decision":
+            return
+        shape = (len(self.hands[node.player]), len(node.actions))
+        node.regret = np.zeros(shape)
+        node.strategy_sum = np.zeros(shape)
+        for child in node.children:
+            self._init_nodes(child)
+
+    @staticmethod
+    def _current(node: _Node) -> np.ndarray:
+        positive = np.maximum(node.regret, 0)
+        totals = positive.sum(axis=1, keepdims=True)
+        return np.where(totals > 0, positive / np.where(totals > 0, totals, 1), 1.0 / positive.shape[1])
+
+    @staticmethod
+    def _average(node: _Node) -> np.ndarray:
+        totals = node.strategy_sum.sum(axis=1, keepdims=True)
+        return np.where(totals > 0, node.strategy_sum / np.where(totals > 0, totals, 1), 1.0 / node.strategy_sum.shape[1])
+
+    def _terminal(self, node: _Node, p: int, reach_opp: np.ndarray) -> np.ndarray:
+        half = self.pot / 2
+        if node.kind == "fold":
+            _, total = self.showdown[p].evaluate(reach_opp, with_net=False)
+            payoff = -(half + node.contrib[p]) if node.folder == p else half + node.contrib[1 - p]
+            return payoff * total
+        net, _ = self.showdown[p].evaluate(reach_opp)
+        return (half + node.contrib[p]) * net
+
+    def _cfr(self, node: _Node, p: int, reach_opp: np.ndarray, weight: float) -> np.ndarray:
+        if node.kind != "decision":
+            return self._terminal(node, p, reach_opp)
+        sigma = self._current(node)
+        if node.player == p:
+            values = np.stack([self._cfr(child, p, reach_opp, weight) for child in node.children], axis=1)
+            ev = (sigma * values).sum(axis=1)
+            node.regret = np.maximum(node.regret + values - ev[:, None], 0)
+            return ev
+        node.strategy_sum += weight * reach_opp[:, None] * sigma
+        return sum(self._cfr(child, p, reach_opp * sigma[:, a], weight) for a, child in enumerate(node.children))
+
+    def _values(self, node: _Node, p: int, reach_opp: np.ndarray, best_response: bool) -> np.ndarray:
+        """Valores contrafactuales de p con estrategias medias (o mejor respuesta de p)"""
+        if node.kind != "decision":
+            return self._terminal(node, p, reach_opp)
+        sigma = self._average(node)
+        if node.player == p:
+            values = np.stack([self._values(child, p, reach_opp, best_response) for child in node.children], axis=1)
+            return values.max(axis=1) if best_response else (sigma * values).sum(axis=1)
+        return sum(self._values(child, p, reach_opp * sigma[:, a], best_response)
+                   for a, child in enumerate(node.children))
+
+    def solve(self, iterations: int = DEFAULT_ITERATIONS) -> "RiverSolver":
+        for _ in range(iterations):
+            self.iterations += 1
+            for p in (0, 1):
+                # CFR+ con promedio lineal de estrategias
+                self._cfr(self.root, p, self.weights[1 - p], float(self.iterations))
+        return self
+
+    def exploitability(self) -> float:
+        """Media de lo que ganaría cada jugador con una mejor respuesta, en fichas por mano"""
+        total = 0.0
+        for p in (0, 1):
+            values = self._values(self.root, p, self.weights[1 - p], best_response=True)
+            _, compatible = self.showdown[p].evaluate(self.weights[1 - p], with_net=False)
+            total += float(self.weights[p] @ values) / float(self.weights[p] @ compatible)
+        return total / 2
+
+    def hand_report(self, player: int, combo: Combo) -> dict:
+        """EV y estrategia media de una combinación concreta en cada nodo en que decide"""
+        combo = tuple(sorted(combo))
+        idx = self.hands[player].index(combo)
+        values = self._values(self.root, player, self.weights[1 - player], best_response=False)
+        _, compatible = self.showdown[player].evaluate(self.weights[1 - player], with_net=False)
+        strategy = []
+
+        def walk(node: _Node, history: List[str]):
+            if node.kind != "decision":
+                return
+            if node.player == player:
+                average = self._average(node)[idx]
+                strategy.append({
+                    "history": " > ".join(history) or "inicio",
+                    "actions": {a: float(prob) for a, prob in zip(node.actions, average)},
+                })
+            for action, child in zip(node.actions, node.children):
+                walk(child, history + [action])
+
+        walk(self.root, [])
+        return {
+            "ev": self.pot / 2 + float(values[idx] / compatible[idx]),
+            "strategy": strategy,
+        }
+
+
+_solutions: "OrderedDict[tuple, RiverSolver]" = OrderedDict()
+# La caché se consulta desde hilos de peticiones; la resolución en sí va fuera del cerrojo
+_solutions_lock = threading.Lock()
+
+
+def solve_river(board: Sequence[int], hero: Combo, pot: int, stack: int,
+                villain_range: Optional[Dict[Combo, float]] = None, hero_range: Optional[Dict[Combo, float]] = None,
+                bet_sizes: Sequence[float] = DEFAULT_BET_SIZES, max_raises: int = 1,
+                hero_first: bool = True, iterations: int = DEFAULT_ITERATIONS) -> dict:
+    """
+    Resuelve un spot de river heads-up y devuelve la estrategia de la mano `hero`.
+    Los rangos por defecto son todas las combinaciones compatibles con el board; la mano del
+    jugador se añade a su rango si no está; del rango rival se quitan las combinaciones que
+    comparten cartas con ella. `bet_sizes` admite hasta MAX_BET_SIZES tamaños en (0, MAX_BET_SIZE].
+    Las soluciones se cachean por spot completo.
+    """
+    start = time.perf_counter()
+    hero = tuple(sorted(hero))
+    board = tuple(sorted(board))
+    bet_sizes = tuple(sorted({float(size) for size in bet_sizes}))
+    if len(bet_sizes) > MAX_BET_SIZES:
+        raise ValueError(f"Como máximo {MAX_BET_SIZES} tamaños de apuesta")
+    if not all(0 < size <= MAX_BET_SIZE for size in bet_sizes):
+        raise ValueError(f"Los tamaños de apuesta deben estar entre 0 y {MAX_BET_SIZE} veces el bote")
+    villain_range = _clean_range(villain_range, board + hero)
+    if not villain_range:
+        raise ValueError("El rango del rival no tiene combinaciones compatibles con la mano y el board")
+    hero_range = _clean_range(hero_range, board)
+    hero_range.setdefault(hero, 1.0)
+    ranges = (hero_range, villain_range) if hero_first else (villain_range, hero_range)
+    key = (board, tuple(sorted(ranges[0].items())), tuple(sorted(ranges[1].items())), pot, stack,
+           tuple(bet_sizes), max_raises, iterations)
+    with _solutions_lock:
+        solver = _solutions.get(key)
+        if solver is not None:
+            _solutions.move_to_end(key)
+    cached = solver is not None
+    if not cached:
+        solver = RiverSolver(board, ranges, pot, stack, bet_sizes, max_raises).solve(iterations)
+        with _solutions_lock:
+            _solutions[key] = solver
+            while len(_solutions) > SOLUTION_CACHE_SIZE:
+                _solutions.popitem(last=False)
+    report = solver.hand_report(0 if hero_first else 1, hero)
+    exploitability = solver.exploitability()
+    report.update({
+        "pot": pot,
+        "effective_stack": stack,
+        "iterations": solver.iterations,
+        "exploitability": exploitability,
+        "exploitability_pct_pot": exploitability / pot * 100 if pot else 0.0,
+        "cached": cached,
+        "solve_ms": (time.perf_counter() - start) * 1000,
+    })
+    return report
+
+
+def _clean_range(weights: Optional[Dict[Combo, float]], board: Sequence[int]) -> Dict[Combo, float]:
+    if weights is None:
+        return {combo: 1.0 for combo in all_combos(board)}
+    dead = set(board)
+    return {tuple(sorted(c)): float(w) for c, w in weights.items() if w > 0 and not dead.intersection(c)}
@@ -0,0 +1,79 @@
+"""
+Coalescencia de peticiones idénticas concurrentes ("single flight").
+
+Cuando varias peticiones piden el mismo análisis a la vez, la primera (líder) ejecuta el
+cálculo y las demás esperan su resultado en lugar de lanzar su propia simulación.
+Si el líder falla o tarda más de `timeout`, cada seguidor calcula el resultado por su cuenta.
+"""
+import copy
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, Hashable
+
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Agrupa llamadas concurrentes con la misma clave en una sola ejecución"""
+
+    def __init__(self, timeout: float = 30.0):
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._stats = Counter()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Ejecuta `fn` o se une a la ejecución en curso con la misma clave.
+        Los seguidores reciben una copia del resultado del líder, así que pueden mutarla.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._stats["leaders"] += 1
+            else:
+                self._stats["coalesced"] += 1
+
+        if leader:
+            try:
+                call.result = fn()
+                return call.result
+            except BaseException as e:
+                call.error = e
+                raise
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.event.set()
+
+        if not call.event.wait(self.timeout):
+            self._count("timeouts")
+            return fn()
+        if call.error is not None:
+            self._count("leader_failures")
+            return fn()
+        return copy.deepcopy(call.result)
+
+    def stats(self) -> Dict[str, int]:
+        """Contadores: líderes, peticiones agrupadas, esperas agotadas, fallos del líder y en curso"""
+        with self._lock:
+            return {
+                "leaders": self._stats["leaders"],
+                "coalesced": self._stats["coalesced"],
+                "timeouts": self._stats["timeouts"],
+                "leader_failures": self._stats["leader_failures"],
+                "in_flight": len(self._calls),
+            }
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
@@ -0,0 +1,154 @@
+"""
+Actualizaciones en tiempo real por mesa (push), pensadas para conexiones WebSocket.
+
+Cada suscriptor de una mesa recibe deltas versionados del estado y los resultados de análisis
+a medida que se producen. El estado no se encola mensaje a mensaje: publicar solo marca al
+suscriptor como pendiente y, al enviar, se calcula un único delta desde la última versión que
+recibió (`PokerGame.get_state_delta`). Varias mutaciones seguidas viajan así en un mensaje
+pequeño y un cliente lento nunca acumula estados obsoletos. Si su versión ya no está en el
+historial, o la mesa tiene un juego nuevo, recibe el estado completo.
+
+Los análisis sí se encolan, con un límite: si un cliente no los consume se descartan los más
+antiguos.
+"""
+import threading
+from collections import Counter, deque
+from typing import Any, Dict, Hashable, Optional, Set
+
+# Análisis pendientes por suscriptor antes de descartar los más antiguos
+MAX_PENDING_ANALYSES = 16
+
+
+class Subscription:
+    """Cola de mensajes de un cliente suscrito a una mesa"""
+    __slots__ = ("table", "compact", "game_id", "version", "_game", "_analyses", "_cond", "_hub")
+
+    def __init__(self, hub: "TableUpdates", table: Hashable, compact: bool):
+        self.table = table
+        self.compact = compact
+        # Juego y versión del último estado enviado
+        self.game_id: Optional[int] = None
+        self.version: Optional[int] = None
+        self._game = None
+        self._analyses: deque = deque(maxlen=MAX_PENDING_ANALYSES)
+        self._cond = threading.Condition()
+        self._hub = hub
+
+    def next_message(self, timeout: Optional[float] = None) -> Optional[dict]:
+        """
+        Siguiente mensaje para el cliente, esperando hasta `timeout` segundos (None si no hay).
+        El estado va siempre antes que los análisis, que se calcularon sobre él.
+        """
+        with self._cond:
+            if self._game is None and not self._analyses:
+                self._cond.wait(timeout)
+            game, self._game = self._game, None
+            analysis = self._analyses.popleft() if game is None and self._analyses else None
+        if game is not None:
+            message = self._state_message(game)
+            if message is not None:
+                return message
+            with self._cond:
+                analysis = self._analyses.popleft() if self._analyses else None
+        if analysis is not None:
+            self._hub._count("analyses_sent")
+        return analysis
+
+    def _state_message(self, game) -> Optional[dict]:
+        if game.game_id == self.game_id and self.version is not None:
+            state = game.get_state_delta(self.version, self.compact)
+            if state["delta"] and not state["changes"] and state["version"] == self.version:
+                return None
+        else:
+            state = dict(game.get_game_state(self.compact), delta=False)
+        self.game_id, self.version = game.game_id, state["version"]
+        self._hub._count("deltas_sent" if state["delta"] else "full_states_sent")
+        return {"type": "state", "game_id": game.game_id, "game_state": state}
+
+    def push_state(self, game):
+        with self._cond:
+            self._game = game
+            self._cond.notify()
+
+    def push_analysis(self, message: dict):
+        with self._cond:
+            if len(self._analyses) == self._analyses.maxlen:
+                self._hub._count("analyses_dropped")
+            self._analyses.append(message)
+            self._cond.notify()
+
+    def resync(self, game):
+        """Fuerza que el próximo estado enviado sea completo (p. ej. si el cliente perdió la base)"""
+        with self._cond:
+            self.game_id = self.version = None
+            if game is not None:
+                self._game = game
+            self._cond.notify()
+
+
+class TableUpdates:
+    """Registro de suscriptores por mesa y difusión de estado y análisis"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tables: Dict[Hashable, Set[Subscription]] = {}
+        self._stats = Counter()
+
+    def subscribe(self, table: Hashable, game=None, compact: bool = False,
+                  game_id: Optional[int] = None, since_version: Optional[int] = None) -> Subscription:
+        """
+        Suscribe un cliente a `table`. Si indica el juego y la versión que ya tiene, el primer
+        mensaje es un delta desde esa versión; si no, el estado completo del juego actual.
+        """
+        subscription = Subscription(self, table, compact)
+        if game_id is not None and since_version is not None:
+            subscription.game_id, subscription.version = game_id, since_version
+        with self._lock:
+            self._tables.setdefault(table, set()).add(subscription)
+            self._stats["subscriptions"] += 1
+        if game is not None:
+            subscription.push_state(game)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscribers = self._tables.get(subscription.table)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._tables[subscription.table]
+
+    def publish_state(self, table: Hashable, game):
+        """Avisa a los suscriptores de `table` de que el estado de `game` ha cambiado"""
+        for subscription in self._subscribers(table):
+            subscription.push_state(game)
+
+    def publish_analysis(self, table: Hashable, game, kind: str, analysis: Any, **meta):
+        """Difunde un resultado de análisis (`kind`: 'analyze_hand', 'hand_grid'...) calculado sobre `game`"""
+        subscribers = self._subscribers(table)
+        if not subscribers:
+            return
+        message = dict(meta, type="analysis", kind=kind, game_id=game.game_id,
+                       version=game.version, analysis=analysis)
+        for subscription in subscribers:
+            subscription.push_analysis(message)
+
+    def stats(self) -> Dict[str, int]:
+        """Contadores: suscripciones, conectados, deltas, estados completos y análisis enviados o descartados"""
+        with self._lock:
+            return {
+                "subscriptions": self._stats["subscriptions"],
+                "connected": sum(len(subscribers) for subscribers in self._tables.values()),
+                "deltas_sent": self._stats["deltas_sent"],
+                "full_states_sent": self._stats["full_states_sent"],
+                "analyses_sent": self._stats["analyses_sent"],
+                "analyses_dropped": self._stats["analyses_dropped"],
+            }
+
+    def _subscribers(self, table: Hashable):
+        with self._lock:
+            return list(self._tables.get(table, ()))
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1